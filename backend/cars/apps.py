@@ -8,6 +8,8 @@ class CarsConfig(AppConfig):
     name = 'cars'
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         # Only run when the server starts, not during reloading
         if 'runserver' in sys.argv and os.environ.get('RUN_MAIN') != 'true':
             # Ensure placeholder image exists
@@ -0,0 +1,148 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.db.models import Count
+
+from .cache import bump_generation, get_generation
+from .models import Car
+
+FIELDS = ('make', 'model', 'city')
+# Signals only reach the process that saved the car, so the index is also
+# rebuilt from the database once it gets older than this many seconds; bulk
+# writes bump the shared 'indexes' generation, which every process checks
+INDEX_MAX_AGE = 300
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def _word_suffixes(value):
+    """'Land Cruiser' -> ['land cruiser', 'cruiser'] so any word can be typed first"""
+    words = _normalize(value).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, field, value) tuples answered with bisect.
+
+    Each distinct field value is stored once per word it contains, together
+    with the number of cars that carry it, so inserts and deletes of single
+    cars only touch the affected entries.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.counts = Counter()
+        self.built_at = time.monotonic()
+        self.generation = get_generation('indexes')
+
+    def add(self, field, value, count=1):
+        if not value:
+            return
+        self.counts[(field, value)] += count
+        if self.counts[(field, value)] == count:
+            for key in _word_suffixes(value):
+                insort(self.keys, (key, field, value))
+
+    def remove(self, field, value):
+        if not value or (field, value) not in self.counts:
+            return
+        self.counts[(field, value)] -= 1
+        if self.counts[(field, value)] > 0:
+            return
+        del self.counts[(field, value)]
+        for key in _word_suffixes(value):
+            position = bisect_left(self.keys, (key, field, value))
+            if position < len(self.keys) and self.keys[position] == (key, field, value):
+                del self.keys[position]
+
+    def search(self, prefix, fields=FIELDS, limit=10):
+        """{field: [{'value', 'count'}, ...]} for values with a word starting with `prefix`"""
+        prefix = _normalize(prefix)
+        matches = {field: {} for field in fields}
+        if prefix:
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and self.keys[position][0].startswith(prefix):
+                _, field, value = self.keys[position]
+                if field in matches:
+                    matches[field][value] = self.counts[(field, value)]
+                position += 1
+        return {
+            field: [
+                {'value': value, 'count': count}
+                for value, count in sorted(values.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            ]
+            for field, values in matches.items()
+        }
+
+    @property
+    def expired(self):
+        return time.monotonic() - self.built_at > INDEX_MAX_AGE or self.generation != get_generation('indexes')
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        for field in FIELDS:
+            rows = Car.objects.filter(is_active=True).order_by().values(field).annotate(count=Count('id'))
+            for row in rows:
+                index.add(field, row[field], row['count'])
+        return index
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None or _index.expired:
+        index = PrefixIndex.build()
+        with _lock:
+            _index = index
+    return _index
+
+
+def search(prefix, fields=FIELDS, limit=10):
+    index = get_index()
+    with _lock:
+        return index.search(prefix, fields=fields, limit=limit)
+
+
+def update_car(old_values, new_values):
+    """Apply one car's change (either side may be None) to the built index"""
+    with _lock:
+        if _index is None:
+            return
+        for field in FIELDS:
+            old = old_values.get(field) if old_values else None
+            new = new_values.get(field) if new_values else None
+            if old == new:
+                continue
+            _index.remove(field, old)
+            _index.add(field, new)
+
+
+def indexed_values(car):
+    """Autocomplete field values of a car instance, skipping deferred fields"""
+    deferred = car.get_deferred_fields()
+    if any(field in deferred for field in FIELDS + ('is_active',)):
+        return None
+    if not car.is_active:
+        # Hidden cars contribute nothing, so deactivating one removes its values
+        return {field: None for field in FIELDS}
+    return {field: getattr(car, field) for field in FIELDS}
+
+
+def invalidate():
+    """
+    Drop the index, in this process and (once the transaction commits) in the
+    others; it is rebuilt lazily on the next search
+    """
+    global _index
+    with _lock:
+        _index = None
+    bump_generation('indexes')
@@ -0,0 +1,175 @@
+"""
+Batched persistence stage for imports.
+
+Parsed listings and their images are buffered and written a batch at a time
+with bulk_create/bulk_update instead of one INSERT/UPDATE round trip per row.
+On PostgreSQL an initial load (an empty or just-truncated table) streams the
+rows with COPY into primary keys reserved from the table's sequence.
+
+Bulk writes skip the post_save signals, so the writer queues image
+derivatives itself and invalidates the response caches and in-process indexes
+when it is closed.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import autocomplete, derivatives, fuzzy
+from .cache import bump_generation
+from .models import Car, CarImage
+
+
+class BulkCarWriter:
+    """
+    Buffers Car rows, field updates and CarImage rows and flushes them in batches.
+
+    `create(car, images)` queues a new unsaved Car together with its
+    `(file, source_url)` images (the first one becomes primary),
+    `add_images(car, images)` queues images for a car that already exists and `update(car, fields)` queues changed fields of
+    an existing car. Use it as a context manager or call close().
+
+    `progress`, if given, is called after every flush with the running
+    `cars_saved` and `images_stored` counts.
+    """
+
+    def __init__(self, batch_size=None, initial_load=False, using='default', progress=None):
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.using = using
+        self.use_copy = initial_load and connections[using].vendor == 'postgresql'
+        self.new_cars = []
+        self.updates = {}
+        self.images = []
+        self.updated_ids = set()
+        self.stats = {'cars_created': 0, 'cars_updated': 0, 'images_created': 0, 'seconds': 0.0}
+        self.progress = progress
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+
+    @property
+    def pending(self):
+        return len(self.new_cars) + len(self.updates) + len(self.images)
+
+    def create(self, car, images=()):
+        self.new_cars.append((car, list(images)))
+        self.maybe_flush()
+
+    def add_images(self, car, images, primary_url=None):
+        for file, source_url in images:
+            self.images.append(CarImage(car=car, image=file, source_url=source_url, is_primary=source_url == primary_url))
+        self.maybe_flush()
+
+    def update(self, car, fields):
+        fields = set(fields)
+        if car.pk in self.updates:
+            fields |= self.updates[car.pk][1]
+        self.updates[car.pk] = (car, fields)
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        started = time.perf_counter()
+        if self.new_cars:
+            cars = [car for car, _ in self.new_cars]
+            self.insert(Car, cars)
+            for car, images in self.new_cars:
+                for index, (file, source_url) in enumerate(images):
+                    self.images.append(CarImage(car=car, image=file, source_url=source_url, is_primary=index == 0))
+            self.stats['cars_created'] += len(cars)
+            self.new_cars = []
+
+        if self.updates:
+            self.write_updates()
+
+        if self.images:
+            self.insert(CarImage, self.images)
+            names = [image.image.name for image in self.images]
+            transaction.on_commit(lambda: derivatives.schedule(names), using=self.using)
+            self.stats['images_created'] += len(self.images)
+            self.images = []
+        self.stats['seconds'] += time.perf_counter() - started
+        if self.progress:
+            self.progress({
+                'cars_saved': self.stats['cars_created'] + self.stats['cars_updated'],
+                'images_stored': self.stats['images_created'],
+            })
+
+    def write_updates(self):
+        # bulk_update takes one field list per call, so group cars by the
+        # set of fields that changed; auto_now is not applied by bulk_update
+        groups = {}
+        touch = Car._meta.get_field('updated_at').pre_save
+        for car, fields in self.updates.values():
+            touch(car, add=False)
+            groups.setdefault(tuple(sorted(fields | {'updated_at'})), []).append(car)
+        for fields, cars in groups.items():
+            Car.objects.using(self.using).bulk_update(cars, fields, batch_size=self.batch_size)
+        self.stats['cars_updated'] += len(self.updates)
+        self.updated_ids.update(self.updates)
+        self.updates = {}
+
+    def insert(self, model, objs):
+        if self.use_copy:
+            copy_insert(model, objs, self.using)
+        else:
+            model.objects.using(self.using).bulk_create(objs, batch_size=self.batch_size)
+
+    def close(self):
+        self.flush()
+        if self.stats['cars_created'] or self.stats['cars_updated'] or self.stats['images_created']:
+            # Runs once the import's transaction commits
+            bump_generation('list', 'facets', *(f'car:{pk}' for pk in self.updated_ids))
+            fuzzy.invalidate()
+            autocomplete.invalidate()
+
+    @property
+    def rows_per_second(self):
+        rows = self.stats['cars_created'] + self.stats['cars_updated'] + self.stats['images_created']
+        return rows / self.stats['seconds'] if self.stats['seconds'] else 0.0
+
+    def report(self):
+        return (
+            f"{self.stats['cars_created']} cars created, {self.stats['cars_updated']} updated, "
+            f"{self.stats['images_created']} images in {self.stats['seconds']:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s{', COPY' if self.use_copy else ''})"
+        )
+
+
+def copy_insert(model, objs, using='default'):
+    """
+    Insert `objs` with PostgreSQL COPY, assigning their primary keys first.
+
+    Keys are drawn from the table's own sequence so later ORM inserts do not
+    collide with them. Field values go through pre_save and get_db_prep_save
+    exactly as in bulk_create, which stores pending image files as well.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    fields = model._meta.concrete_fields
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+            [table, pk_column, len(objs)],
+        )
+        for obj, (pk,) in zip(objs, cursor.fetchall()):
+            obj.pk = pk
+
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with cursor.cursor.copy(f'COPY {connection.ops.quote_name(table)} ({columns}) FROM STDIN') as copy:
+            for obj in objs:
+                copy.write_row([
+                    field.get_db_prep_save(field.pre_save(obj, True), connection)
+                    for field in fields
+                ])
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = using
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+# Cached car data embeds generation counters in its keys; bumping a counter
+# invalidates everything built on it at once without enumerating keys.
+#   facets      - any Car row change
+#   list        - any Car or CarImage change (lists show the primary image)
+#   car:<pk>    - changes to that car or its images (detail responses)
+#   indexes     - bulk writes such as imports; every process rebuilds its
+#                 in-process fuzzy and autocomplete indexes
+GENERATION_KEY = 'cars:generation:{scope}'
+STATS_KEY = 'cars:stats:{action}:{outcome}'
+
+# Query parameters that never change which cars match
+NON_FILTER_PARAMS = {'page', 'page_size', 'cursor', 'pagination', 'ordering', 'format'}
+
+CACHED_ACTIONS = ('list', 'retrieve')
+
+
+def _fresh_generation():
+    # Time based so a counter that was evicted never restarts at a value whose
+    # entries may still be cached
+    return int(time.time() * 1000)
+
+
+def get_generation(scope='facets'):
+    key = GENERATION_KEY.format(scope=scope)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _fresh_generation(), timeout=None)
+        generation = cache.get(key, 0)
+    return generation
+
+
+def bump_generation(*scopes):
+    # Inside a transaction, wait for the commit: a bump before it would let
+    # another worker cache the old rows under the new generation
+    transaction.on_commit(lambda: _bump(scopes or ('facets',)))
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_generation(), timeout=None)
+
+
+def invalidate_car(car_id, rows_changed=True):
+    """Invalidate cached data affected by a write to one car or its images"""
+    scopes = ['list', f'car:{car_id}']
+    if rows_changed:
+        scopes.append('facets')
+    bump_generation(*scopes)
+
+
+def normalize_params(query_params, ignore=()):
+    """Order-independent representation of a QueryDict with empty values dropped"""
+    normalized = []
+    for key in sorted(query_params.keys()):
+        if key in ignore:
+            continue
+        values = sorted(value.strip() for value in query_params.getlist(key) if value.strip())
+        if values:
+            normalized.append((key, values))
+    return normalized
+
+
+def make_key(prefix, params, scope='facets'):
+    digest = hashlib.md5(json.dumps(params, separators=(',', ':')).encode('utf-8')).hexdigest()
+    return f'{prefix}:{get_generation(scope)}:{digest}'
+
+
+def facets_timeout():
+    return getattr(settings, 'CARS_FACETS_CACHE_TIMEOUT', 300)
+
+
+def response_timeout():
+    return getattr(settings, 'CARS_RESPONSE_CACHE_TIMEOUT', 600)
+
+
+def record(action, outcome):
+    key = STATS_KEY.format(action=action, outcome=outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    stats = {}
+    for action in CACHED_ACTIONS:
+        hits = cache.get(STATS_KEY.format(action=action, outcome='hit'), 0)
+        misses = cache.get(STATS_KEY.format(action=action, outcome='miss'), 0)
+        total = hits + misses
+        stats[action] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else None,
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized data of anonymous list/retrieve responses.
+
+    Keys contain the host (responses carry absolute URLs), the canonicalized
+    query string and the generation of the data they depend on, so Car and
+    CarImage signals only invalidate the lists and the one detail entry a
+    write actually affects. The entries and counters must live in a cache
+    shared by every process that writes cars (see CACHES in settings).
+    """
+
+    def get_response_cache_key(self, request, action):
+        params = [request.scheme, request.get_host(), normalize_params(request.query_params)]
+        if action == 'retrieve':
+            pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+            return make_key(f'cars:retrieve:{pk}', params, scope=f'car:{pk}')
+        return make_key('cars:list', params, scope='list')
+
+    def get_validators_cache_key(self, request, action):
+        """
+        ConditionalGetMixin's validators, kept under the same generations as
+        the responses, so cache hits and 304s skip the validator aggregate
+        """
+        params = [
+            request.scheme, request.get_host(), getattr(request, 'accepted_media_type', ''),
+            sorted(request.query_params.lists()),
+        ]
+        if action == 'retrieve':
+            pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+            return make_key(f'cars:validators:retrieve:{pk}', params, scope=f'car:{pk}')
+        return make_key('cars:validators:list', params, scope='list')
+
+    def get_validators_cache_timeout(self):
+        return response_timeout()
+
+    def cached_response(self, request, action, render):
+        if request.user and request.user.is_authenticated:
+            return render()
+
+        key = self.get_response_cache_key(request, action)
+        data = cache.get(key)
+        if data is not None:
+            record(action, 'hit')
+            return Response(data)
+
+        record(action, 'miss')
+        response = render()
+        if response.status_code == 200:
+            cache.set(key, response.data, response_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, 'list', lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, 'retrieve', lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,204 @@
+"""
+Resized WebP and JPEG derivatives of car photos, and the tiny inline
+placeholder the car grid paints while they load.
+
+Rendering happens in a process pool, off the request path: new images are
+queued once their transaction commits and the finished variant map is stored
+on every CarImage that shares the original. Originals are content-addressed,
+so derivatives are too; they live in a directory of their own under
+car_variants/ and are removed together with the original (see
+cars.storage.release).
+
+render_variants() runs in the worker processes and only needs Pillow, so this
+module must not import models at import time.
+"""
+import base64
+import io
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+from functools import partial
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+VARIANT_ROOT = 'car_variants'
+EXIF_ORIENTATION = 0x0112
+# Longest side of the inline blur-up preview; ~200-400 bytes as WebP
+PLACEHOLDER_SIZE = 20
+PLACEHOLDER_QUALITY = 40
+
+# extension: (Pillow format, save options)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_dir(name):
+    """car_images/ab/<sha256>.jpg -> car_variants/ab/<sha256>"""
+    directory, filename = os.path.split(name)
+    relative = os.path.relpath(os.path.join(directory, os.path.splitext(filename)[0]), 'car_images')
+    return os.path.join(VARIANT_ROOT, relative)
+
+
+def load_display_image(image, size, rotated):
+    """Decode `image` (drafted towards `size`), upright and in RGB/RGBA"""
+    # Let the JPEG decoder scale down by a power of two while decoding
+    image.draft('RGB', size[::-1] if rotated else size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+
+def display_size(image):
+    """(width, height, rotated) as the photo is shown, after EXIF orientation"""
+    width, height = image.size
+    rotated = image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8)
+    return (height, width, True) if rotated else (width, height, False)
+
+
+def placeholder_data_uri(image):
+    """A PLACEHOLDER_SIZE px WebP preview of a decoded image as a data: URI"""
+    preview = image.copy()
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+    buffer = io.BytesIO()
+    preview.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def render_placeholder(source_path):
+    with Image.open(source_path) as image:
+        width, height, rotated = display_size(image)
+        size = (PLACEHOLDER_SIZE, max(1, round(height * PLACEHOLDER_SIZE / width)))
+        return placeholder_data_uri(load_display_image(image, size, rotated))
+
+
+def render_variants(source_path, target_dir, widths):
+    """
+    Write `<width>.<ext>` files for each width narrower than the source (or one
+    at the source width for small photos) and return
+    {'width', 'height', 'files': {ext: {width: filename}}, 'placeholder'}.
+
+    Existing files are kept: originals never change under a name, so neither
+    do their derivatives.
+    """
+    with Image.open(source_path) as image:
+        width, height, rotated = display_size(image)
+        targets = sorted({w for w in widths if w < width}) or [width]
+        files = {ext: {str(w): f'{w}.{ext}' for w in targets} for ext in FORMATS}
+        missing = [
+            w for w in targets
+            if any(not os.path.exists(os.path.join(target_dir, files[ext][str(w)])) for ext in FORMATS)
+        ]
+        decode_width = max(missing) if missing else PLACEHOLDER_SIZE
+        image = load_display_image(image, (decode_width, max(1, round(height * decode_width / width))), rotated)
+        if missing:
+            os.makedirs(target_dir, exist_ok=True)
+        for w in missing:
+            resized = image.resize((w, max(1, round(image.height * w / image.width))), Image.LANCZOS)
+            for ext, (pil_format, options) in FORMATS.items():
+                frame = resized.convert('RGB') if pil_format == 'JPEG' and resized.mode != 'RGB' else resized
+                path = os.path.join(target_dir, files[ext][str(w)])
+                partial_path = f'{path}.{uuid.uuid4().hex}.part'
+                frame.save(partial_path, pil_format, **options)
+                os.replace(partial_path, path)
+        placeholder = placeholder_data_uri(image)
+    return {'width': width, 'height': height, 'files': files, 'placeholder': placeholder}
+
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: forked children would share the parent's DB connections
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def submit(name):
+    """Queue rendering of one stored original; returns the future"""
+    from .storage import car_image_storage
+
+    future = get_executor().submit(
+        render_variants,
+        car_image_storage.path(name),
+        car_image_storage.path(variant_dir(name)),
+        list(settings.IMAGE_VARIANT_WIDTHS),
+    )
+    with _lock:
+        _pending.add(future)
+    future.add_done_callback(partial(store, name, threading.get_ident()))
+    return future
+
+
+def schedule(names):
+    """Queue every distinct name in `names`"""
+    return [submit(name) for name in dict.fromkeys(names) if name]
+
+
+def touch_cars(car_ids):
+    """Serialized images changed: move the cars' validators and cached responses on"""
+    from django.utils import timezone
+
+    from .cache import invalidate_car
+    from .models import Car
+
+    Car.objects.filter(pk__in=car_ids).update(updated_at=timezone.now())
+    for car_id in car_ids:
+        invalidate_car(car_id, rows_changed=False)
+
+
+def store(name, submitted_from, future):
+    """Done callback: save the variant map on all rows sharing `name`"""
+    from django.db import connection
+
+    from .models import CarImage
+
+    try:
+        result = future.result()
+        directory = variant_dir(name)
+        variants = {
+            'width': result['width'],
+            'height': result['height'],
+            'files': {
+                ext: {w: os.path.join(directory, filename).replace(os.sep, '/') for w, filename in files.items()}
+                for ext, files in result['files'].items()
+            },
+        }
+        images = CarImage.objects.filter(image=name)
+        car_ids = set(images.values_list('car_id', flat=True))
+        images.update(variants=variants, placeholder=result['placeholder'])
+        touch_cars(car_ids)
+    except Exception as e:
+        print(f"Error rendering variants of {name}: {e}")
+    finally:
+        # Callbacks normally run on the executor's thread, which owns this
+        # connection; one attached to an already finished future runs inline
+        if threading.get_ident() != submitted_from:
+            connection.close()
+        with _lock:
+            _pending.discard(future)
+
+
+def wait(timeout=None):
+    """Block until every queued rendering has been stored"""
+    with _lock:
+        pending = list(_pending)
+    started = time.monotonic()
+    wait_futures(pending, timeout=timeout)
+    # store() runs right after a future resolves; give it time to finish
+    while _pending and (timeout is None or time.monotonic() - started < timeout):
+        time.sleep(0.05)
@@ -0,0 +1,285 @@
+"""
+Image ingestion stage for imported listings.
+
+Photos are downloaded on a thread pool that shares one pooled HTTP session.
+Bodies are streamed to temporary files in fixed-size chunks while being
+hashed, so memory use does not depend on image size, and every file is named
+after its content. Per-image byte, socket timeout and wall-clock limits keep
+one slow or oversized CDN response from stalling an import. 429 and 5xx
+responses and dropped connections are retried with the page fetcher's
+backoff, as long as the retry still fits in the image's deadline. Photos already
+in cars.httpcache are copied from there, after a conditional request when
+the CDN sent validators.
+"""
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.files import File
+from requests.adapters import HTTPAdapter
+
+from . import httpcache
+from .scraper import RETRY_STATUSES, backoff_delay
+
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+}
+URL_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+class DownloadError(Exception):
+    """An image was rejected or could not be downloaded"""
+
+
+class RetryableError(DownloadError):
+    """A throttled, failing or dropped request that may succeed when repeated"""
+
+    def __init__(self, message, retry_after=''):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class NotModified(Exception):
+    """The cached copy of an image is still current"""
+
+
+class DownloadedImage(File):
+    """
+    An image spooled to a temporary file.
+
+    FileSystemStorage moves `temporary_file_path()` into MEDIA_ROOT instead of
+    copying it, as with large uploads; the file is only opened when a storage
+    asks for its chunks. Call discard() for downloads that were never saved.
+    """
+
+    def __init__(self, path, name, size, digest):
+        self._file = None
+        super().__init__(None, name=name)
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    @property
+    def file(self):
+        if self._file is None and os.path.exists(self.path):
+            self._file = open(self.path, 'rb')
+        return self._file
+
+    @file.setter
+    def file(self, value):
+        self._file = value
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def guess_extension(url, content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in CONTENT_TYPE_EXTENSIONS:
+        return CONTENT_TYPE_EXTENSIONS[content_type]
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return '.jpg' if ext in ('', '.jpeg') or ext not in URL_EXTENSIONS else ext
+
+
+class ImageDownloader:
+    """Parallel, streaming image downloads with per-image limits"""
+
+    def __init__(self, workers=None, max_bytes=None, timeout=None, deadline=None, headers=None, cache=None,
+                 max_retries=None, backoff=None):
+        self.workers = workers or settings.IMAGE_DOWNLOAD_WORKERS
+        self.max_bytes = max_bytes or settings.IMAGE_MAX_BYTES
+        self.timeout = timeout or settings.IMAGE_DOWNLOAD_TIMEOUT
+        self.deadline = deadline or settings.IMAGE_DOWNLOAD_DEADLINE
+        self.max_retries = settings.SCRAPER_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff or settings.SCRAPER_BACKOFF
+        self.headers = headers or {}
+        self.cache = httpcache.get_cache() if cache is None else cache
+        self.session = None
+        self.executor = None
+        self.stats = {
+            'downloaded': 0, 'failed': 0, 'retries': 0, 'bytes': 0, 'seconds': 0.0,
+            'cache_hits': 0, 'cache_revalidated': 0, 'bytes_saved': 0,
+        }
+
+    def __enter__(self):
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-download')
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def fetch(self, url):
+        """Stream `url` to a temporary file; raises DownloadError when a limit is hit"""
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry is not None and entry.fresh(self.cache.ttl):
+            return self.from_cache(url, entry, 'cache_hits')
+
+        # Every attempt and the waits between them share the image's deadline
+        deadline_at = time.monotonic() + self.deadline
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.fetch_once(url, entry, deadline_at)
+            except RetryableError as e:
+                delay = backoff_delay(attempt, self.backoff, e.retry_after)
+                if attempt == self.max_retries or time.monotonic() + delay >= deadline_at:
+                    raise DownloadError(str(e)) from e
+                self.stats['retries'] += 1
+                time.sleep(delay)
+
+    def fetch_once(self, url, entry, deadline_at):
+        fd, path = tempfile.mkstemp(suffix='.download', dir=settings.FILE_UPLOAD_TEMP_DIR)
+        expired = threading.Event()
+        watchdog = None
+        request_headers = entry.validators() if entry is not None else {}
+        try:
+            with os.fdopen(fd, 'wb') as out, \
+                    self.session.get(url, stream=True, timeout=self.timeout, headers=request_headers) as response:
+                if response.status_code == 304 and entry is not None:
+                    entry = self.cache.revalidated(entry, response.headers) or entry
+                    raise NotModified()
+                if response.status_code in RETRY_STATUSES:
+                    raise RetryableError(
+                        f"{response.status_code} from {url}", response.headers.get('Retry-After', ''),
+                    )
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if content_type and not content_type.startswith('image/'):
+                    raise DownloadError(f"{url} is {content_type}, not an image")
+                declared = response.headers.get('Content-Length', '')
+                if declared.isdigit() and int(declared) > self.max_bytes:
+                    raise DownloadError(f"{url} is {declared} bytes, limit is {self.max_bytes}")
+
+                # The socket timeout bounds each read, not a body that trickles
+                # in; past the deadline the watchdog cuts the connection
+                watchdog = threading.Timer(
+                    max(deadline_at - time.monotonic(), 0), abort, [response_socket(response), expired],
+                )
+                watchdog.start()
+                digest = hashlib.sha256()
+                size = 0
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise DownloadError(f"{url} exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    out.write(chunk)
+            if expired.is_set():
+                raise DownloadError("Connection cut by the deadline watchdog")
+            if not size:
+                raise DownloadError(f"{url} returned an empty body")
+        except NotModified:
+            os.remove(path)
+            return self.from_cache(url, entry, 'cache_revalidated')
+        except (requests.RequestException, DownloadError) as e:
+            os.remove(path)
+            if expired.is_set():
+                raise DownloadError(f"{url} took longer than {self.deadline}s") from None
+            if isinstance(e, (RetryableError, requests.ConnectionError, requests.Timeout)):
+                raise RetryableError(str(e), getattr(e, 'retry_after', '')) from e
+            raise DownloadError(str(e)) from e
+        except BaseException:
+            os.remove(path)
+            raise
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+
+        if self.cache:
+            with open(path, 'rb') as f:
+                self.cache.store(url, f, response.headers)
+        digest = digest.hexdigest()
+        return DownloadedImage(path, f'{digest[:32]}{guess_extension(url, content_type)}', size, digest)
+
+    def from_cache(self, url, entry, counter):
+        """Copy a cached photo to a temporary file as if it was downloaded"""
+        fd, path = tempfile.mkstemp(suffix='.download', dir=settings.FILE_UPLOAD_TEMP_DIR)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as out, entry.open() as body:
+                for chunk in iter(lambda: body.read(CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    digest.update(chunk)
+                    out.write(chunk)
+        except OSError as e:
+            # Evicted or replaced since the lookup
+            os.remove(path)
+            raise DownloadError(f"Cached copy of {url} is gone: {e}") from e
+        self.stats[counter] += 1
+        self.stats['bytes_saved'] += size
+        digest = digest.hexdigest()
+        return DownloadedImage(path, f'{digest[:32]}{guess_extension(url, entry.meta["content_type"])}', size, digest)
+
+    def try_fetch(self, url):
+        try:
+            image = self.fetch(url)
+        except DownloadError as e:
+            print(f"Error downloading image from {url}: {e}")
+            self.stats['failed'] += 1
+            return None
+        self.stats['downloaded'] += 1
+        self.stats['bytes'] += image.size
+        return image
+
+    def download_all(self, urls):
+        """{url: DownloadedImage or None} for the distinct `urls`, fetched in parallel"""
+        urls = list(dict.fromkeys(urls))
+        started = time.monotonic()
+        results = dict(zip(urls, self.executor.map(self.try_fetch, urls)))
+        self.stats['seconds'] += time.monotonic() - started
+        return results
+
+
+def response_socket(response):
+    """Socket a streamed response is read from, or None"""
+    sock = getattr(response.raw.connection, 'sock', None)
+    if sock is None:
+        # http.client detaches the socket from the connection when the server
+        # closes after the response; the body file still reads from it
+        body = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+        sock = getattr(getattr(body, 'raw', None), '_sock', None)
+    return sock
+
+
+def abort(sock, expired):
+    """Shut down a socket that is still being read so the reader wakes up"""
+    expired.set()
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def discard_unused(downloads):
+    """Remove temporary files of downloads that were not moved into storage"""
+    for image in downloads.values():
+        if image is not None:
+            image.discard()
@@ -0,0 +1,244 @@
+"""
+lxml extraction engine for auto.ria.com pages.
+
+Each page is parsed once by lxml's C HTML parser and queried with XPath
+expressions compiled at import time, instead of a Python-built
+BeautifulSoup tree scanned by repeated select()/find_all() passes.
+
+ListingPage answers the same questions as parser_integration.SoupListingPage
+and follows BeautifulSoup's text rules (get_text() skips comments and
+script/style/template contents, :contains() and `string=` do not), so
+parser_integration.build_car_data() returns the same dict from either. The
+saved pages in cars/fixtures/autoria/ and `manage.py benchmark_listing_parser`
+check that.
+"""
+import re
+
+from lxml import etree, html as lxml_html
+
+PRICE_NUMBER_RE = re.compile(r"[\d\s,.]+")
+CURRENCY_SIGNS = ("$", "€", "грн")
+
+
+def has_class(name):
+    """XPath predicate equivalent to the CSS class selector .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Text nodes BeautifulSoup's get_text() returns for an element
+TEXT = etree.XPath("descendant::text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+TITLE = etree.XPath(f"(//h1[{has_class('head')}])[1]")
+# Pre-filter; the match itself is decided on the span's single string
+MILEAGE_SPANS = etree.XPath("//span[contains(., 'тис. км') or comment()[contains(., 'тис. км')]]")
+DESCRIPTION = etree.XPath(f"(//dd[{has_class('additional-data')} and {has_class('show-line')}])[1]")
+DESCRIPTION_FALLBACK = etree.XPath(f"(//div[{has_class('additional-data')}])[1]")
+
+LABELS = etree.XPath(f"//div[{has_class('technical-info')}]//span[{has_class('label')}]")
+LABEL_ARGUMENT = etree.XPath(f"following-sibling::span[{has_class('argument')}][1]")
+# span.label:contains(...), td.label:contains(...), div.car-characteristics span.label:contains(...)
+LABEL_FALLBACKS = [
+    etree.XPath(f"(//span[{has_class('label')}][contains(., $name)])[1]"),
+    etree.XPath(f"(//td[{has_class('label')}][contains(., $name)])[1]"),
+    etree.XPath(f"(//div[{has_class('car-characteristics')}]//span[{has_class('label')}][contains(., $name)])[1]"),
+]
+LABEL_FALLBACK_VALUE = etree.XPath("following-sibling::*[self::span or self::td or self::div][1]")
+CHARACTERISTICS = etree.XPath(
+    f"//div[{has_class('car-characteristics')} or {has_class('technical-info')} or {has_class('all-parameters')}]"
+)
+CONDITION_LABELS = etree.XPath(f"//span[{has_class('label')}]")
+CONDITION_LABEL_RE = re.compile("Технічний стан", re.IGNORECASE)
+# BeautifulSoup's find_next(): the first match after the tag in document order
+CONDITION_ARGUMENT = etree.XPath(
+    f"(descendant::span[{has_class('argument')}] | following::span[{has_class('argument')}])[1]"
+)
+
+PRICES = [
+    etree.XPath(f"(//div[{has_class('price_value')}])[1]"),
+    etree.XPath(f"(//strong[{has_class('bold')} and {has_class('green')} and {has_class('size22')}])[1]"),
+    etree.XPath(f"(//span[{has_class('price')}])[1]"),
+    etree.XPath(f"(//div[{has_class('price-seller')}])[1]"),
+    etree.XPath(f"(//div[{has_class('price-value')}])[1]"),
+]
+# Pre-filter for the whole-page price scan; string-value also counts
+# script text, so every candidate is checked again on its get_text() text
+PRICE_CANDIDATES = etree.XPath(
+    "//*[self::span or self::div or self::strong or self::p]"
+    "[contains(., '$') or contains(., '€') or contains(., 'грн')]"
+)
+
+LOCATION = etree.XPath(f"(//div[{has_class('item_region')}]//span[{has_class('region')}])[1]")
+
+IMAGES = [
+    etree.XPath(f"//div[{has_class('gallery-order')}]//img[{has_class('outline')}]"),
+    etree.XPath(f"//div[{has_class('photo-620x465')}]//img"),
+    etree.XPath(f"//div[{has_class('gallery-img')}]//img"),
+    etree.XPath(f"//div[{has_class('preview-gallery')}]//img"),
+    etree.XPath(f"//div[{has_class('carousel-inner')}]//img"),
+    etree.XPath(f"//*[{has_class('gallery-order')}]//source"),
+    etree.XPath(f"//*[{has_class('carousel')}]//img[@src]"),
+    etree.XPath(f"//div[{has_class('carousel-inner')}]//source[@srcset]"),
+]
+ALL_IMAGES = etree.XPath("//img")
+
+LISTING_LINKS = etree.XPath(f"//a[{has_class('address')}][@href]/@href")
+
+
+def parse_html(html):
+    if isinstance(html, str):
+        # lxml refuses str input that starts with an encoding declaration
+        html = html.encode('utf-8')
+    return lxml_html.document_fromstring(html, parser=lxml_html.HTMLParser(encoding='utf-8'))
+
+
+def get_text(element, strip=False):
+    """BeautifulSoup's Tag.get_text()"""
+    if strip:
+        return ''.join(text.strip() for text in TEXT(element))
+    return ''.join(TEXT(element))
+
+
+def single_string(element):
+    """BeautifulSoup's Tag.string: the only string inside `element`, else None"""
+    while True:
+        children = list(element)
+        if element.text:
+            return None if children else element.text
+        if len(children) != 1 or children[0].tail:
+            return None
+        element = children[0]
+        if not isinstance(element.tag, str):
+            # A comment is a string too
+            return element.text
+
+
+def price_from_text(text):
+    """Price in the first number found in `text` (EUR converted to USD), or None"""
+    match = PRICE_NUMBER_RE.search(text)
+    if not match:
+        return None
+    try:
+        price = float(match.group(0).replace(" ", "").replace(",", "."))
+    except ValueError:
+        return None
+    if '€' in text:
+        price *= 1.1  # Approximate EUR to USD conversion
+    return price
+
+
+def clean_image_url(src):
+    """Full-size variant of an auto.ria photo URL"""
+    if 'auto.ria.com' in src and 'small' in src:
+        src = src.replace('small', 'big')
+    return src
+
+
+def listing_links(html, site='https://auto.ria.com'):
+    """Listing URLs on `site` found on one search results page, in page order"""
+    links = []
+    for href in LISTING_LINKS(parse_html(html)):
+        href = str(href)
+        if href.startswith(site) and href not in links:
+            links.append(href)
+    return links
+
+
+class ListingPage:
+    """One listing page parsed with lxml; see parser_integration.build_car_data"""
+
+    def __init__(self, html):
+        self.root = parse_html(html)
+        self.labels = {}
+
+    def text_of(self, xpath, strip=True):
+        found = xpath(self.root)
+        return get_text(found[0], strip=strip) if found else None
+
+    def title(self):
+        return self.text_of(TITLE)
+
+    def mileage_text(self):
+        for span in MILEAGE_SPANS(self.root):
+            string = single_string(span)
+            if string and "тис. км" in string:
+                return get_text(span, strip=True)
+        return None
+
+    def description(self):
+        description = self.text_of(DESCRIPTION)
+        if description is None:
+            description = self.text_of(DESCRIPTION_FALLBACK)
+        return description or ""
+
+    def label(self, label_name):
+        # The engine label is looked up twice per page
+        if label_name not in self.labels:
+            self.labels[label_name] = self.find_label(label_name)
+        return self.labels[label_name]
+
+    def find_label(self, label_name):
+        name = label_name.lower()
+        for label in LABELS(self.root):
+            if name in get_text(label, strip=True).lower():
+                argument = LABEL_ARGUMENT(label)
+                if argument:
+                    return get_text(argument[0], strip=True)
+        for xpath in LABEL_FALLBACKS:
+            found = xpath(self.root, name=label_name)
+            if found:
+                value = LABEL_FALLBACK_VALUE(found[0])
+                if value:
+                    return get_text(value[0], strip=True)
+        return None
+
+    def characteristics_texts(self):
+        for element in CHARACTERISTICS(self.root):
+            yield get_text(element)
+
+    def condition_text(self):
+        for label in CONDITION_LABELS(self.root):
+            string = single_string(label)
+            if string and CONDITION_LABEL_RE.search(string):
+                argument = CONDITION_ARGUMENT(label)
+                return get_text(argument[0], strip=True) if argument else ""
+        return None
+
+    def price(self):
+        price = 0.0
+        for xpath in PRICES:
+            found = xpath(self.root)
+            if found:
+                parsed = price_from_text(get_text(found[0], strip=True))
+                if parsed is not None:
+                    price = parsed
+                    break
+        if price <= 0:
+            for element in PRICE_CANDIDATES(self.root):
+                text = get_text(element, strip=True)
+                if any(sign in text for sign in CURRENCY_SIGNS):
+                    parsed = price_from_text(text)
+                    if parsed is not None:
+                        price = parsed
+                        break
+        return price
+
+    def location(self):
+        return self.text_of(LOCATION)
+
+    def image_urls(self, limit=10):
+        image_urls = []
+        for xpath in IMAGES:
+            for img in xpath(self.root)[:limit]:
+                src = img.get('src') or img.get('data-src') or img.get('srcset') or img.get('data-lazy')
+                if src and not src.endswith('no_photo.png'):
+                    src = clean_image_url(src)
+                    if src not in image_urls:
+                        image_urls.append(src)
+        if not image_urls:
+            for img in ALL_IMAGES(self.root):
+                src = img.get('src') or img.get('data-src')
+                if src and 'auto.ria.com' in src and not src.endswith('no_photo.png'):
+                    if src not in image_urls:
+                        image_urls.append(src)
+        # Drop query strings
+        return [url.split('?')[0] for url in image_urls]
@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.db.models import Count, Q
+
+# Low-cardinality choice fields are grouped together in a single query
+CHOICE_FACETS = ('fuel_type', 'transmission', 'body_type', 'condition')
+# Free-text fields get one grouped query each
+VALUE_FACETS = ('make', 'city')
+
+PRICE_BUCKETS = [(0, 5000), (5000, 10000), (10000, 20000), (20000, 30000), (30000, 50000), (50000, None)]
+YEAR_BUCKETS = [(None, 2000), (2000, 2005), (2005, 2010), (2010, 2015), (2015, 2020), (2020, None)]
+
+
+def _bucket_filter(field, lower, upper):
+    condition = Q()
+    if lower is not None:
+        condition &= Q(**{f'{field}__gte': lower})
+    if upper is not None:
+        condition &= Q(**{f'{field}__lt': upper})
+    return condition
+
+
+def _sorted_counts(counts):
+    return [
+        {'value': value, 'count': count}
+        for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+    ]
+
+
+def compute_facets(queryset):
+    """
+    Per-value counts for the sidebar filters over an already filtered queryset.
+
+    Runs four queries regardless of how many facets are returned: one GROUP BY
+    over all choice fields (at most a few hundred combinations, rolled up here),
+    one per free-text field and one conditional aggregate for the range buckets.
+    """
+    queryset = queryset.order_by()
+    facets = {}
+
+    choice_counts = {field: defaultdict(int) for field in CHOICE_FACETS}
+    for row in queryset.values(*CHOICE_FACETS).annotate(count=Count('id')):
+        for field in CHOICE_FACETS:
+            if row[field] is not None:
+                choice_counts[field][row[field]] += row['count']
+    for field in CHOICE_FACETS:
+        facets[field] = _sorted_counts(choice_counts[field])
+
+    for field in VALUE_FACETS:
+        rows = queryset.values(field).annotate(count=Count('id'))
+        facets[field] = _sorted_counts({row[field]: row['count'] for row in rows})
+
+    aggregates = {}
+    for field, buckets in (('price', PRICE_BUCKETS), ('year', YEAR_BUCKETS)):
+        for i, (lower, upper) in enumerate(buckets):
+            aggregates[f'{field}_{i}'] = Count('id', filter=_bucket_filter(field, lower, upper))
+    totals = queryset.aggregate(**aggregates)
+    for field, buckets in (('price', PRICE_BUCKETS), ('year', YEAR_BUCKETS)):
+        facets[field] = [
+            {'min': lower, 'max': upper, 'count': totals[f'{field}_{i}']}
+            for i, (lower, upper) in enumerate(buckets)
+        ]
+
+    return facets
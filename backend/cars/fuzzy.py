@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Count
+
+from .cache import bump_generation, get_generation
+from .models import Car
+
+# Same default as pg_trgm's similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+# Single-car edits only reach the process that saved the car, so in-process
+# indexes are also rebuilt once they get older than this many seconds; bulk
+# writes bump the shared 'indexes' generation, which every process checks
+INDEX_MAX_AGE = 300
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def trigrams(text):
+    """Trigram set of `text` computed the way pg_trgm does it"""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    In-process inverted trigram index over a set of distinct strings.
+
+    Each value carries the number of cars with it, so single-car edits and
+    deletes only touch counts; values no car carries any more are skipped
+    by search() until the next rebuild drops them.
+    """
+
+    def __init__(self, values=()):
+        self.values = []
+        self.sizes = []
+        self.positions = {}
+        self.counts = Counter()
+        self.postings = defaultdict(list)
+        self.built_at = time.monotonic()
+        self.generation = get_generation('indexes')
+        for value in values:
+            self.add(value)
+
+    def add(self, value, count=1):
+        if not value:
+            return
+        self.counts[value] += count
+        if value in self.positions:
+            return
+        position = len(self.values)
+        grams = trigrams(value)
+        self.values.append(value)
+        self.sizes.append(len(grams))
+        self.positions[value] = position
+        for gram in grams:
+            self.postings[gram].append(position)
+
+    def remove(self, value):
+        if not self.counts.get(value):
+            return
+        self.counts[value] -= 1
+
+    def search(self, query, limit=5, threshold=SIMILARITY_THRESHOLD):
+        """(value, similarity) pairs ordered best first"""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        matches = []
+        for position, count in shared.items():
+            if not self.counts[self.values[position]]:
+                continue
+            similarity = count / (len(grams) + self.sizes[position] - count)
+            if similarity >= threshold:
+                matches.append((self.values[position], similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+    @property
+    def expired(self):
+        return time.monotonic() - self.built_at > INDEX_MAX_AGE or self.generation != get_generation('indexes')
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _get_index(field, make=None):
+    key = (field, make)
+    index = _indexes.get(key)
+    if index is None or index.expired:
+        queryset = Car.objects.filter(is_active=True)
+        if make is not None:
+            queryset = queryset.filter(make=make)
+        index = TrigramIndex()
+        for row in queryset.order_by().values(field).annotate(count=Count('id')):
+            index.add(row[field], row['count'])
+        with _lock:
+            _indexes[key] = index
+    return index
+
+
+def update_car(old_values, new_values):
+    """
+    Move one car's make/model between the indexes that are already built.
+    Either side may be None (created or deleted); hidden cars have None
+    values, as autocomplete.indexed_values() reports them.
+    """
+    old_make, old_model = (old_values or {}).get('make'), (old_values or {}).get('model')
+    new_make, new_model = (new_values or {}).get('make'), (new_values or {}).get('model')
+    with _lock:
+        make_index = _indexes.get(('make', None))
+        if make_index is not None and old_make != new_make:
+            make_index.remove(old_make)
+            make_index.add(new_make)
+        if (old_make, old_model) != (new_make, new_model):
+            if ('model', old_make) in _indexes:
+                _indexes[('model', old_make)].remove(old_model)
+            if ('model', new_make) in _indexes:
+                _indexes[('model', new_make)].add(new_model)
+
+
+def invalidate():
+    """
+    Drop every index, in this process and (once the transaction commits) in
+    the others; they are rebuilt lazily on the next lookup
+    """
+    with _lock:
+        _indexes.clear()
+    bump_generation('indexes')
+
+
+def find_similar(field, value, make=None, limit=5):
+    """
+    Canonical `field` values (make or model) closest to `value`.
+
+    Uses pg_trgm (and its GIN index) on PostgreSQL and the in-process
+    TrigramIndex elsewhere; model lookups are narrowed to the given make.
+    """
+    connection = connections[Car.objects.db]
+    if connection.vendor == 'postgresql':
+        queryset = Car.objects.filter(is_active=True)
+        if make is not None:
+            queryset = queryset.filter(make=make)
+        rows = (
+            queryset.filter(**{f'{field}__trigram_similar': value})
+            .values(field)
+            .annotate(similarity=TrigramSimilarity(field, value))
+            .order_by('-similarity', field)
+            .distinct()[:limit]
+        )
+        return [(row[field], row['similarity']) for row in rows]
+    return _get_index(field, make).search(value, limit=limit)
+
+
+def resolve(field, value, make=None):
+    """Best match for `value` as a dict suitable for the API, or None"""
+    if not value:
+        return None
+    matches = find_similar(field, value, make=make)
+    if not matches:
+        return {'query': value, 'value': None, 'similarity': 0.0, 'alternatives': []}
+    best, similarity = matches[0]
+    return {
+        'query': value,
+        'value': best,
+        'similarity': round(similarity, 3),
+        'alternatives': [match for match, _ in matches[1:]],
+    }
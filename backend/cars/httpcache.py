@@ -0,0 +1,305 @@
+"""
+Persistent cache of the pages and photos the auto.ria.com import downloads.
+
+Each response is one file under SCRAPER_CACHE_DIR, named after the hash of
+its URL: a JSON header line (validators, charset, when it was stored)
+followed by the body, zstd-compressed when the zstandard package is
+installed and gzipped otherwise. Images are stored as they are. Files are
+written to a temporary name and renamed, so threads and processes sharing
+the directory never see a partial entry.
+
+A cached response with an ETag or Last-Modified is revalidated with
+If-None-Match/If-Modified-Since on every use, and a 304 reuses the stored
+body. One without validators is reused without asking the site until it is
+older than the caller's TTL. The directory is kept under
+SCRAPER_CACHE_MAX_SIZE by deleting the least recently used files first; a
+hit touches the file's mtime.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ENTRY_SUFFIX = '.entry'
+CHUNK_SIZE = 64 * 1024
+# Evict down to this fraction of the limit, so not every store rescans
+EVICT_TO = 0.9
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+
+def is_compressible(content_type):
+    return (content_type or '').startswith(COMPRESSIBLE_TYPES)
+
+
+class CacheEntry:
+    """Header of one cached response; the body is read on demand"""
+
+    def __init__(self, path, meta, offset):
+        self.path = path
+        self.meta = meta
+        self.offset = offset
+
+    @property
+    def size(self):
+        """Uncompressed body size: what a hit saves downloading"""
+        return self.meta['size']
+
+    @property
+    def charset(self):
+        return self.meta.get('charset') or 'utf-8'
+
+    def validators(self):
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+    def fresh(self, ttl):
+        """Usable without a request: no validators to revalidate with, and younger than `ttl`"""
+        return not self.validators() and time.time() - self.meta['stored_at'] < ttl
+
+    def open(self):
+        """Readable binary stream of the decompressed body"""
+        f = open(self.path, 'rb')
+        f.seek(self.offset)
+        codec = self.meta['codec']
+        if codec == 'gzip':
+            return gzip.GzipFile(fileobj=f, mode='rb')
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+        return f
+
+    def read(self):
+        with self.open() as body:
+            return body.read()
+
+
+class HTTPCache:
+    """Size-bounded on-disk response cache; see the module docstring"""
+
+    def __init__(self, directory, max_size=None, ttl=None):
+        self.directory = directory
+        self.max_size = settings.SCRAPER_CACHE_MAX_SIZE if max_size is None else max_size
+        self.ttl = settings.SCRAPER_CACHE_TTL if ttl is None else ttl
+        self.lock = threading.Lock()
+        # Bytes on disk, counted on the first store
+        self.disk_size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def lookup(self, url):
+        """CacheEntry for `url`, or None"""
+        path = self.path_for(url)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                offset = f.tell()
+            # Least recently used goes first on eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self.remove(path)
+            return None
+        if meta.get('url') != url or meta.get('codec') == 'zstd' and zstandard is None:
+            return None
+        return CacheEntry(path, meta, offset)
+
+    def store(self, url, body, headers, charset=None):
+        """
+        Cache a 200 response. `body` is bytes or a file object positioned at
+        the start of the body (a spooled image), `charset` the encoding text
+        was decoded with; returns the entry or None.
+        """
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return None
+        content_type = headers.get('Content-Type', '')
+        if is_compressible(content_type):
+            codec = 'zstd' if zstandard is not None else 'gzip'
+        else:
+            codec = 'identity'
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': content_type,
+            'charset': charset,
+            'codec': codec,
+            'stored_at': time.time(),
+            'size': len(body) if isinstance(body, bytes) else os.fstat(body.fileno()).st_size - body.tell(),
+        }
+        return self.write(url, meta, lambda out: self.write_body(out, codec, body))
+
+    def revalidated(self, entry, headers):
+        """A 304 confirmed `entry`: take the new validators, keep the stored body"""
+        meta = dict(entry.meta, stored_at=time.time())
+        if headers.get('ETag'):
+            meta['etag'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            meta['last_modified'] = headers['Last-Modified']
+
+        def copy_body(out):
+            with open(entry.path, 'rb') as f:
+                f.seek(entry.offset)
+                shutil.copyfileobj(f, out, CHUNK_SIZE)
+
+        return self.write(entry.meta['url'], meta, copy_body)
+
+    def write_body(self, out, codec, body):
+        if codec == 'zstd':
+            writer = zstandard.ZstdCompressor(level=6).stream_writer(out, closefd=False)
+        elif codec == 'gzip':
+            writer = gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6, mtime=0)
+        else:
+            writer = None
+        target = writer or out
+        if isinstance(body, bytes):
+            target.write(body)
+        else:
+            shutil.copyfileobj(body, target, CHUNK_SIZE)
+        if writer is not None:
+            writer.close()
+
+    def write(self, url, meta, write_body):
+        path = self.path_for(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(json.dumps(meta).encode('utf-8') + b'\n')
+                write_body(out)
+            written = os.path.getsize(temp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(temp_path, path)
+        except BaseException as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if isinstance(e, OSError):
+                # A full disk costs the cache, not the import
+                print(f"HTTP cache: could not store {url}: {e}")
+                return None
+            raise
+        self.added(written - replaced)
+        return self.lookup(url)
+
+    def remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        self.added(-size)
+
+    def entries(self):
+        """(mtime, size, path) of every entry on disk"""
+        found = []
+        for directory, _, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith(ENTRY_SUFFIX):
+                    path = os.path.join(directory, filename)
+                    try:
+                        stat_result = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((stat_result.st_mtime, stat_result.st_size, path))
+        return found
+
+    def added(self, delta):
+        with self.lock:
+            if self.disk_size is None:
+                # Other processes write here too; recount instead of trusting a total
+                self.disk_size = sum(size for _, size, _ in self.entries())
+            else:
+                self.disk_size += delta
+            if self.disk_size <= self.max_size:
+                return
+            entries = sorted(self.entries())
+            self.disk_size = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if self.disk_size <= self.max_size * EVICT_TO:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.disk_size -= size
+
+
+class CachedResponse(requests.Response):
+    """A requests.Response rebuilt from a cache entry"""
+
+    def __init__(self, url, entry, status):
+        super().__init__()
+        self.url = url
+        self.status_code = 200
+        self._content = entry.read()
+        self.encoding = entry.charset
+        self.headers = CaseInsensitiveDict({'Content-Type': entry.meta['content_type'], 'X-Cache': status})
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_cache():
+    """The process's HTTPCache, or None when SCRAPER_CACHE_DIR is empty"""
+    global _cache
+    if not settings.SCRAPER_CACHE_DIR:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = HTTPCache(settings.SCRAPER_CACHE_DIR)
+    return _cache
+
+
+def get(url, ttl=None, stats=None, session=requests, **kwargs):
+    """
+    requests.get() through the cache for the synchronous scraper helpers.
+
+    A hit or a 304 comes back as a 200 CachedResponse with an X-Cache
+    header; `stats` (a dict) collects hits, revalidations and bytes saved.
+    """
+    cache = get_cache()
+    entry = cache.lookup(url) if cache else None
+    if entry is not None and entry.fresh(cache.ttl if ttl is None else ttl):
+        count(stats, 'cache_hits', entry.size)
+        return CachedResponse(url, entry, 'HIT')
+    if entry is not None:
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **entry.validators()}
+
+    response = session.get(url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        entry = cache.revalidated(entry, response.headers) or entry
+        count(stats, 'cache_revalidated', entry.size)
+        return CachedResponse(url, entry, 'REVALIDATED')
+    if cache is not None and response.status_code == 200:
+        cache.store(url, response.content, response.headers, charset=response.encoding or response.apparent_encoding)
+    return response
+
+
+def count(stats, key, saved):
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + 1
+        stats['bytes_saved'] = stats.get('bytes_saved', 0) + saved
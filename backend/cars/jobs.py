@@ -0,0 +1,166 @@
+"""
+Database-backed queue of auto.ria.com imports.
+
+The API only enqueues an ImportJob row; `manage.py run_import_worker` claims
+queued jobs and runs them in its own threads, so no HTTP worker waits on a
+scrape and no broker is needed. A job is claimed with a conditional UPDATE
+(status queued -> running), which only one worker can win on any database.
+
+While a job runs, its progress counters are saved every
+IMPORT_JOB_HEARTBEAT_INTERVAL seconds. The save doubles as a heartbeat: a
+running job that stops reporting for IMPORT_JOB_STALE_AFTER seconds belonged
+to a worker that died and is queued again, up to IMPORT_JOB_MAX_ATTEMPTS
+runs. The job's next attempt resumes the ImportRun journal the dead one left
+behind (see cars.journal).
+
+The worker tells the web processes about imported cars through the cache
+generations (see cars.cache), so it must share the web processes' cache:
+the default cache directory when both run on one host, REDIS_URL otherwise.
+"""
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ImportJob
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(limit, incremental=False, user=None):
+    return ImportJob.objects.create(limit=limit, incremental=incremental, requested_by=user)
+
+
+def requeue_stale():
+    """Hand the jobs of dead workers back to the queue; returns how many"""
+    cutoff = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    stale = ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING, heartbeat_at__lt=cutoff)
+    stale.filter(attempts__gte=settings.IMPORT_JOB_MAX_ATTEMPTS).update(
+        status=ImportJob.STATUS_FAILED,
+        error='Worker stopped responding',
+        finished_at=timezone.now(),
+    )
+    return stale.update(status=ImportJob.STATUS_QUEUED, worker='')
+
+
+def claim(worker):
+    """Take the oldest queued job for `worker`, or None"""
+    running = ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING)
+    # A full import replaces every car in one transaction; run it alone
+    if running.filter(incremental=False).exists():
+        return None
+    job = ImportJob.objects.filter(status=ImportJob.STATUS_QUEUED).order_by('created_at', 'id').first()
+    if job is None or (not job.incremental and running.exists()):
+        return None
+
+    now = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_QUEUED).update(
+        status=ImportJob.STATUS_RUNNING,
+        worker=worker,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        # Another worker was faster; the caller polls again
+        return None
+    job.refresh_from_db()
+    return job
+
+
+class JobProgress:
+    """
+    Progress callback for import_cars_sync that saves from a thread of its own.
+
+    The scraper reports from inside its event loop, where the ORM must not be
+    used, so calls only merge the counters in memory.
+    """
+
+    def __init__(self, job_id, interval=None):
+        self.job_id = job_id
+        self.interval = settings.IMPORT_JOB_HEARTBEAT_INTERVAL if interval is None else interval
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'import-job-{job_id}-progress', daemon=True)
+
+    def __call__(self, counters):
+        with self.lock:
+            self.counters.update(counters)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    self.save()
+                except Exception as e:
+                    # A missed heartbeat must not end the others, or the
+                    # running job would look dead and be handed out again
+                    print(f"Import job {self.job_id}: progress not saved, retrying: {e}")
+                    connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+
+    def save(self):
+        ImportJob.objects.filter(pk=self.job_id, status=ImportJob.STATUS_RUNNING).update(
+            progress=self.snapshot(),
+            heartbeat_at=timezone.now(),
+        )
+
+
+def run_job(job):
+    """Run a claimed job to completion and record the outcome"""
+    from .parser_integration import import_cars_sync
+
+    progress = JobProgress(job.pk)
+    progress.start()
+    count = None
+    error = ''
+    try:
+        print(f"Import job {job.pk}: limit={job.limit}, incremental={job.incremental}")
+        count = import_cars_sync(
+            limit=job.limit,
+            admin_user_id=job.requested_by_id,
+            incremental=job.incremental,
+            progress=progress,
+            job=job,
+        )
+    except Exception:
+        error = traceback.format_exc()
+        print(f"Import job {job.pk} failed:\n{error}")
+    finally:
+        progress.stop()
+
+    try:
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.STATUS_FAILED if error else ImportJob.STATUS_SUCCEEDED,
+            progress=progress.snapshot(),
+            imported_count=count,
+            error=error,
+            finished_at=timezone.now(),
+            heartbeat_at=timezone.now(),
+        )
+    finally:
+        # Jobs run on worker threads, each with its own connection
+        connection.close()
+    print(f"Import job {job.pk} finished: {count} cars, {progress.snapshot()}")
+    return count
@@ -0,0 +1,273 @@
+"""
+Persistent journal of auto.ria.com import runs.
+
+Every import is recorded as an ImportRun. The search pages it walked and
+each listing URL it found are journaled, along with how far the URL got:
+discovered, fetched, parsed (the car dict is kept) and stored, or failed.
+Resuming an interrupted run skips what is done. Discovery continues after
+the last journaled search page, unfinished URLs are fetched again, and
+parsed cars are stored without fetching them again. Failed URLs stay
+failed until retry_failed() puts them back in the queue.
+
+The scraper reports from inside its event loop, where the ORM must not be
+used, so RunJournal only buffers the events. Its own thread writes them
+every IMPORT_JOURNAL_FLUSH_INTERVAL seconds, which also keeps the run's
+updated_at fresh while the import is alive. Events whose write fails stay
+buffered for the next one. A crash loses at most that interval's events,
+and those URLs are simply fetched again. Cars are
+marked stored in the transaction that writes them.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ImportRun, ImportRunURL
+
+UNFINISHED = (ImportRunURL.STATE_DISCOVERED, ImportRunURL.STATE_FETCHED)
+# Tries of the flush that ends a run before its events are given up
+FINAL_FLUSH_ATTEMPTS = 3
+
+
+def start_run(limit, incremental, job=None):
+    return ImportRun.objects.create(limit=limit, incremental=incremental, job=job)
+
+
+def run_for_job(job):
+    """The job's unfinished run, when a worker died during it, else a new one"""
+    run = job.runs.exclude(status=ImportRun.STATUS_COMPLETED).order_by('-created_at').first()
+    if run is not None:
+        print(f"Resuming import run {run.pk} of job {job.pk}")
+        return run
+    return start_run(job.limit, job.incremental, job=job)
+
+
+def resumable_run(completed=False):
+    """
+    The latest run that did not complete (or, with `completed`, the latest
+    run that is not in progress), or None. A run still marked running counts
+    once it has been quiet for IMPORT_JOB_STALE_AFTER seconds.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    statuses = [ImportRun.STATUS_INTERRUPTED]
+    if completed:
+        statuses.append(ImportRun.STATUS_COMPLETED)
+    return ImportRun.objects.filter(
+        Q(status__in=statuses) | Q(status=ImportRun.STATUS_RUNNING, updated_at__lt=cutoff)
+    ).order_by('-created_at').first()
+
+
+def retry_failed(run, urls=None):
+    """Queue the failed URLs of `run` (or just those in `urls`) again; returns how many"""
+    failed = run.urls.filter(state=ImportRunURL.STATE_FAILED)
+    if urls is not None:
+        failed = failed.filter(url__in=urls)
+    count = failed.update(state=ImportRunURL.STATE_DISCOVERED, error='', updated_at=timezone.now())
+    if count:
+        ImportRun.objects.filter(pk=run.pk).update(status=ImportRun.STATUS_INTERRUPTED, finished_at=None)
+    return count
+
+
+def summary(run):
+    """{state: URL count} of `run`"""
+    counts = dict(run.urls.values_list('state').annotate(count=Count('id')).order_by())
+    return {state: counts.get(state, 0) for state, _ in ImportRunURL.STATE_CHOICES}
+
+
+def finish(run, error=''):
+    """Mark `run` completed when nothing is left to do, else interrupted"""
+    run.refresh_from_db()
+    states = summary(run)
+    outstanding = sum(states[state] for state in UNFINISHED) + states[ImportRunURL.STATE_PARSED]
+    discovered = run.discovery_complete or sum(states.values()) >= run.limit
+    run.status = ImportRun.STATUS_COMPLETED if discovered and not outstanding and not error else ImportRun.STATUS_INTERRUPTED
+    run.error = error
+    run.finished_at = timezone.now() if run.status == ImportRun.STATUS_COMPLETED else None
+    run.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    print(f"Import run {run.pk} {run.status}: {states}")
+    return run
+
+
+class RunJournal:
+    """Journal of one ImportRun; see the module docstring"""
+
+    def __init__(self, run, interval=None):
+        self.run = run
+        self.interval = settings.IMPORT_JOURNAL_FLUSH_INTERVAL if interval is None else interval
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.updates = {}
+        self.exhausted = False
+        self.flushing = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.loop, name=f'import-run-{run.pk}-journal', daemon=True)
+
+    # Where a resumed scrape picks up
+
+    def start_page(self):
+        """First search page to fetch, or None when discovery already finished"""
+        if self.run.discovery_complete:
+            return None
+        return self.run.last_page + 1
+
+    def known_urls(self):
+        return set(self.run.urls.values_list('url', flat=True))
+
+    def pending_urls(self):
+        """Discovered URLs that were not fetched and parsed yet, in discovery order"""
+        return list(self.run.urls.filter(state__in=UNFINISHED).values_list('url', flat=True))
+
+    # Scraper events, called from the event loop
+
+    def discovered(self, page, links):
+        with self.lock:
+            self.pages[page] = list(links)
+
+    def discovery_complete(self):
+        """The search results ran out before the run's limit"""
+        with self.lock:
+            self.exhausted = True
+
+    def fetched(self, url):
+        self.update(url, ImportRunURL.STATE_FETCHED, attempted=True)
+
+    def parsed(self, url, car_data):
+        self.update(url, ImportRunURL.STATE_PARSED, data=car_data)
+
+    def failed(self, url, error):
+        self.update(url, ImportRunURL.STATE_FAILED, error=error, attempted=True)
+
+    def update(self, url, state, data=None, error='', attempted=False):
+        with self.lock:
+            previous = self.updates.get(url, {})
+            self.updates[url] = {
+                'state': state,
+                'data': data,
+                'error': error,
+                'attempts': previous.get('attempts', 0) + attempted,
+            }
+
+    # Writing
+
+    def start(self):
+        ImportRun.objects.filter(pk=self.run.pk).update(status=ImportRun.STATUS_RUNNING, updated_at=timezone.now())
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        # The last events have nowhere else to go: retry a passing lock, then fail loudly
+        for attempt in range(FINAL_FLUSH_ATTEMPTS):
+            try:
+                self.flush()
+                return
+            except Exception as e:
+                if attempt == FINAL_FLUSH_ATTEMPTS - 1:
+                    raise
+                print(f"Import run {self.run.pk}: journal not saved, retrying: {e}")
+                connection.close_if_unusable_or_obsolete()
+                time.sleep(self.interval)
+
+    def loop(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    # The events are back in the buffers; the next tick retries
+                    print(f"Import run {self.run.pk}: journal not saved, retrying: {e}")
+                    connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Write the buffered events; the importing thread calls this once the scrape ends"""
+        # The loop and the importing thread must not write one URL's events out of order
+        with self.flushing:
+            with self.lock:
+                pages, self.pages = self.pages, {}
+                updates, self.updates = self.updates, {}
+                exhausted, self.exhausted = self.exhausted, False
+            try:
+                with transaction.atomic():
+                    last_page = self.write(pages, updates, exhausted)
+            except Exception:
+                self.requeue(pages, updates, exhausted)
+                raise
+        self.run.last_page = last_page
+        self.run.discovery_complete = self.run.discovery_complete or exhausted
+
+    def requeue(self, pages, updates, exhausted):
+        """Put events whose write failed back under the ones buffered since"""
+        with self.lock:
+            self.pages = {**pages, **self.pages}
+            for url, update in updates.items():
+                if url in self.updates:
+                    self.updates[url]['attempts'] += update['attempts']
+                else:
+                    self.updates[url] = update
+            self.exhausted = self.exhausted or exhausted
+
+    def write(self, pages, updates, exhausted):
+        """Save one flush's events; returns the run's last journaled search page"""
+        if pages:
+            ImportRunURL.objects.bulk_create(
+                [ImportRunURL(run=self.run, url=url, page=page) for page, links in sorted(pages.items()) for url in links],
+                batch_size=settings.IMPORT_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+        if updates:
+            urls = list(updates)
+            rows = [
+                row
+                for start in range(0, len(urls), settings.IMPORT_BATCH_SIZE)
+                for row in self.run.urls.filter(url__in=urls[start:start + settings.IMPORT_BATCH_SIZE])
+            ]
+            for row in rows:
+                update = updates[row.url]
+                row.state = update['state']
+                row.data = update['data']
+                row.error = update['error']
+                row.attempts += update['attempts']
+                row.updated_at = timezone.now()
+            ImportRunURL.objects.bulk_update(
+                rows, ['state', 'data', 'error', 'attempts', 'updated_at'], batch_size=settings.IMPORT_BATCH_SIZE,
+            )
+        last_page = max([self.run.last_page, *pages])
+        run_changes = {'updated_at': timezone.now(), 'last_page': last_page}
+        if exhausted:
+            run_changes['discovery_complete'] = True
+        ImportRun.objects.filter(pk=self.run.pk).update(**run_changes)
+        return last_page
+
+    # The storing stage, on the importing thread
+
+    def parsed_cars(self):
+        """Car dicts parsed but not stored yet, in discovery order"""
+        return list(self.run.urls.filter(state=ImportRunURL.STATE_PARSED).values_list('data', flat=True))
+
+    def stored(self, urls):
+        """Call inside the transaction that wrote the cars of `urls`"""
+        urls = list(urls)
+        for start in range(0, len(urls), settings.IMPORT_BATCH_SIZE):
+            self.run.urls.filter(url__in=urls[start:start + settings.IMPORT_BATCH_SIZE]).update(
+                state=ImportRunURL.STATE_STORED, data=None, updated_at=timezone.now(),
+            )
+
+    def any_stored(self):
+        return self.run.urls.filter(state=ImportRunURL.STATE_STORED).exists()
+
+    def seen_urls(self):
+        """Listings the run found online: parsed or stored"""
+        return set(self.run.urls.filter(
+            state__in=(ImportRunURL.STATE_PARSED, ImportRunURL.STATE_STORED)
+        ).values_list('url', flat=True))
+
+    def complete(self):
+        """The run saw every listing on the site: discovery ran out and nothing failed"""
+        self.run.refresh_from_db()
+        return self.run.discovery_complete and not self.run.urls.filter(state=ImportRunURL.STATE_FAILED).exists()
@@ -0,0 +1,118 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from cars.bulk import BulkCarWriter
+from cars.models import Car, CarImage
+
+User = get_user_model()
+
+MAKES = {
+    'Toyota': ['RAV4', 'Land Cruiser', 'Highlander'],
+    'Mitsubishi': ['Pajero', 'Outlander', 'L200'],
+    'Nissan': ['Patrol', 'X-Trail', 'Navara'],
+    'Volkswagen': ['Touareg', 'Tiguan', 'Amarok'],
+}
+CITIES = ['Kyiv', 'Lviv', 'Kharkiv', 'Odesa', 'Dnipro']
+
+
+class RollbackDataset(Exception):
+    """Raised to discard the written rows once a run has been timed"""
+
+
+class Command(BaseCommand):
+    help = 'Compare row-at-a-time and batched import writes on synthetic listings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--listings',
+            type=int,
+            default=10000,
+            help='Number of synthetic listings to write (default: 10000)'
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=2,
+            help='Images per listing (default: 2)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Writer batch size (default: IMPORT_BATCH_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        listings = self.generate_listings(options['listings'], options['images'])
+        rows = len(listings) * (1 + options['images'])
+        self.stdout.write(f"{len(listings)} listings, {rows} rows, database: {connection.vendor}")
+
+        baseline = self.timed(self.write_one_by_one, listings)
+        self.stdout.write(f"row at a time   {baseline:8.2f}s  {rows / baseline:10.0f} rows/s")
+
+        batched = self.timed(self.write_batched, listings, options['batch_size'])
+        self.stdout.write(f"bulk writer     {batched:8.2f}s  {rows / batched:10.0f} rows/s")
+
+        if connection.vendor == 'postgresql':
+            copied = self.timed(self.write_batched, listings, options['batch_size'], True)
+            self.stdout.write(f"bulk writer+COPY{copied:8.2f}s  {rows / copied:10.0f} rows/s")
+            batched = min(batched, copied)
+
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {baseline / batched:.1f}x"))
+
+    def timed(self, write, *args):
+        """Seconds `write` takes inside a transaction that is rolled back afterwards"""
+        try:
+            with transaction.atomic():
+                seller = User.objects.create(username='bulk-benchmark-seller')
+                started = time.perf_counter()
+                write(seller, *args)
+                elapsed = time.perf_counter() - started
+                raise RollbackDataset()
+        except RollbackDataset:
+            pass
+        return elapsed
+
+    def write_one_by_one(self, seller, listings):
+        # What the importers did before: one INSERT per car and per image
+        for fields, image_names in listings:
+            car = Car.objects.create(seller=seller, **fields)
+            for i, name in enumerate(image_names):
+                CarImage.objects.create(car=car, image=name, is_primary=(i == 0))
+
+    def write_batched(self, seller, listings, batch_size, initial_load=False):
+        with BulkCarWriter(batch_size=batch_size, initial_load=initial_load) as writer:
+            for fields, image_names in listings:
+                writer.create(Car(seller=seller, **fields), [(name, None) for name in image_names])
+
+    def generate_listings(self, count, images):
+        rng = random.Random(42)
+        listings = []
+        for i in range(count):
+            make = rng.choice(list(MAKES))
+            fields = {
+                'make': make,
+                'model': rng.choice(MAKES[make]),
+                'year': rng.randint(1995, 2025),
+                'mileage': rng.randint(0, 400000),
+                'vehicle_type': 'SUV',
+                'condition': 'used',
+                'fuel_type': rng.choice(['diesel', 'gasoline']),
+                'transmission': rng.choice(['manual', 'automatic']),
+                'body_type': 'suv',
+                'country': 'Ukraine',
+                'city': rng.choice(CITIES),
+                'price': Decimal(rng.randint(3000, 90000)),
+                'description': f'Synthetic listing {i}',
+                'original_url': f'https://auto.ria.com/uk/auto_benchmark_{i}.html',
+                'is_imported': True,
+            }
+            # Plain names keep the benchmark about rows, not file storage
+            image_names = [f'car_images/benchmark-{i}-{j}.jpg' for j in range(images)]
+            listings.append((fields, image_names))
+        return listings
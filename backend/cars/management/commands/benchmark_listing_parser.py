@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cars.parser_integration import extract_listing_links, parse_car_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'fixtures', 'autoria')
+ENGINES = ('bs4', 'lxml')
+
+
+class Command(BaseCommand):
+    help = 'Compare the BeautifulSoup and lxml listing parsers on saved auto.ria.com pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixtures',
+            default=FIXTURES_DIR,
+            help='Directory of saved pages (default: cars/fixtures/autoria)'
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=5,
+            help='Times every page is parsed per engine (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        pages = []
+        for filename in sorted(os.listdir(options['fixtures'])):
+            if filename.endswith('.html'):
+                with open(os.path.join(options['fixtures'], filename), encoding='utf-8') as f:
+                    pages.append((filename, f.read()))
+        if not pages:
+            raise CommandError(f"No .html pages in {options['fixtures']}")
+        listings = [(name, html) for name, html in pages if name.startswith('auto_')]
+        searches = [(name, html) for name, html in pages if name.startswith('search_')]
+
+        # Both engines must produce the same result for every page
+        mismatches = 0
+        for name, html in listings:
+            url = f'https://auto.ria.com/uk/{name}'
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = {engine: parse_car_html(html, url, engine=engine) for engine in ENGINES}
+            mismatches += self.compare(name, results)
+        for name, html in searches:
+            results = {engine: extract_listing_links(html, engine=engine) for engine in ENGINES}
+            mismatches += self.compare(name, results)
+
+        timings = {}
+        for engine in ENGINES:
+            # parse_car_html prints on every page; keep that out of the timing
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for _ in range(options['rounds']):
+                    for name, html in listings:
+                        parse_car_html(html, name, engine=engine)
+                    for name, html in searches:
+                        extract_listing_links(html, engine=engine)
+                timings[engine] = time.perf_counter() - start
+
+        total = options['rounds'] * len(pages)
+        size = sum(len(html.encode('utf-8')) for _, html in pages) * options['rounds']
+        self.stdout.write(
+            f"{len(listings)} listing and {len(searches)} search pages, {options['rounds']} rounds, "
+            f"{size / len(pages) / options['rounds'] / 1024:.0f} KB per page"
+        )
+        self.stdout.write(f"{'engine':<8} {'pages/s':>9} {'ms/page':>9} {'MB/s':>7}")
+        for engine in ENGINES:
+            seconds = timings[engine]
+            self.stdout.write(
+                f"{engine:<8} {total / seconds:>9.1f} {seconds * 1000 / total:>9.2f} {size / seconds / 1024 / 1024:>7.1f}"
+            )
+        self.stdout.write(f"lxml speedup: {timings['bs4'] / timings['lxml']:.1f}x")
+        if mismatches:
+            raise CommandError(f"{mismatches} pages parsed differently by the two engines")
+        self.stdout.write(self.style.SUCCESS("Both engines returned identical results for every page"))
+
+    def compare(self, name, results):
+        expected, actual = results['bs4'], results['lxml']
+        if expected == actual:
+            return 0
+        self.stdout.write(self.style.ERROR(f"{name}: results differ"))
+        if isinstance(expected, dict) and isinstance(actual, dict):
+            for key in sorted(set(expected) | set(actual)):
+                if expected.get(key) != actual.get(key):
+                    self.stdout.write(f"  {key}: bs4={expected.get(key)!r} lxml={actual.get(key)!r}")
+        else:
+            self.stdout.write(f"  bs4={expected!r}\n  lxml={actual!r}")
+        return 1
@@ -0,0 +1,115 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve as static_serve
+
+from militex import media
+
+SINK_CHUNK_SIZE = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = 'Compare worker CPU time per served megabyte of the /media/ serving modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size-mb',
+            type=int,
+            default=8,
+            help='Size of the served file in megabytes (default: 8)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Requests per mode (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        # Looks like a content-addressed photo, so the immutable path is measured
+        path = 'car_images/ab/' + 'ab' * 32 + '.jpg'
+        os.makedirs(os.path.dirname(os.path.join(root, path)))
+        with open(os.path.join(root, path), 'wb') as f:
+            f.write(os.urandom(options['size_mb'] * 1024 * 1024))
+
+        self.factory = RequestFactory()
+        self.sender, receiver = socket.socketpair()
+        sink = threading.Thread(target=self.drain, args=(receiver,), daemon=True)
+        sink.start()
+        try:
+            with override_settings(MEDIA_ROOT=root, MEDIA_SERVE_MODE='django'):
+                etag = media.serve(self.factory.get('/'), path)['ETag']
+                cases = [
+                    ('static.serve, streamed in Python', lambda: static_serve(self.factory.get('/'), path, document_root=root), False),
+                    ('media.serve, os.sendfile', lambda: media.serve(self.factory.get('/'), path), True),
+                    ('media.serve, 1 MB range, os.sendfile', lambda: media.serve(self.factory.get('/', HTTP_RANGE='bytes=0-1048575'), path), True),
+                    ('media.serve, 304 revalidation', lambda: media.serve(self.factory.get('/', HTTP_IF_NONE_MATCH=etag), path), True),
+                ]
+                results = [self.measure(label, view, sendfile, options['requests']) for label, view, sendfile in cases]
+            with override_settings(MEDIA_ROOT=root, MEDIA_SERVE_MODE='x-accel-redirect'):
+                results.append(self.measure(
+                    'media.serve, X-Accel-Redirect', lambda: media.serve(self.factory.get('/'), path), True, options['requests']
+                ))
+        finally:
+            self.sender.close()
+            sink.join()
+            shutil.rmtree(root)
+
+        self.stdout.write(f"{'mode':<40} {'status':>6} {'MB sent':>9} {'CPU ms':>9} {'CPU ms/MB':>10} {'ms/request':>11}")
+        for label, status, sent, cpu, per_request in results:
+            megabytes = sent / (1024 * 1024)
+            per_mb = f'{cpu * 1000 / megabytes:.3f}' if megabytes else '-'
+            self.stdout.write(
+                f"{label:<40} {status:>6} {megabytes:>9.1f} {cpu * 1000:>9.1f} {per_mb:>10} {per_request * 1000:>11.3f}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            "CPU is the worker thread's own time; with X-Accel-Redirect and 304s the proxy or the browser cache sends the bytes"
+        ))
+
+    def drain(self, receiver):
+        buffer = bytearray(SINK_CHUNK_SIZE)
+        while receiver.recv_into(buffer):
+            pass
+        receiver.close()
+
+    def send(self, response, sendfile):
+        """Write the body to the socket the way a WSGI worker would"""
+        file = getattr(response, 'file_to_stream', None)
+        if sendfile and file is not None:
+            # What gunicorn's file wrapper does: sendfile from the current offset
+            fd = file.fileno()
+            offset = os.lseek(fd, 0, os.SEEK_CUR)
+            remaining = int(response['Content-Length'])
+            sent = 0
+            while remaining:
+                count = os.sendfile(self.sender.fileno(), fd, offset + sent, remaining)
+                if not count:
+                    break
+                sent += count
+                remaining -= count
+        else:
+            sent = 0
+            for chunk in (response.streaming_content if response.streaming else [response.content]):
+                self.sender.sendall(chunk)
+                sent += len(chunk)
+        response.close()
+        return sent
+
+    def measure(self, label, view, sendfile, requests):
+        sent = 0
+        status = None
+        started_cpu = time.thread_time()
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = view()
+            status = response.status_code
+            sent += self.send(response, sendfile)
+        elapsed = time.perf_counter() - started
+        return label, status, sent, time.thread_time() - started_cpu, elapsed / requests
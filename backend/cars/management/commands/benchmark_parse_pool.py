@@ -0,0 +1,137 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from functools import partial
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cars.scraper import ListingScraper, parse_pool
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'fixtures', 'autoria')
+LINKS_PER_PAGE = 20
+
+
+def quiet_worker():
+    """Pool initializer: the parser prints every field it extracts"""
+    django.setup()
+    sys.stdout = open(os.devnull, 'w')
+
+
+class FixtureFetcher:
+    """Stands in for AsyncFetcher, serving saved pages from memory"""
+
+    concurrency = 8
+
+    def __init__(self, listings, pages, latency):
+        self.listings = listings
+        self.pages = pages
+        self.latency = latency
+
+    async def fetch(self, url, binary=False, ttl=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if 'page=' in url:
+            return url.rsplit('page=', 1)[1]
+        number = int(url.rsplit('/', 1)[1])
+        return self.listings[number % len(self.listings)]
+
+    def extract_links(self, page):
+        start = (int(page) - 1) * LINKS_PER_PAGE
+        return [f'fixture://listing/{number}' for number in range(start, min(start + LINKS_PER_PAGE, self.pages))]
+
+
+class Command(BaseCommand):
+    help = 'Measure import parsing throughput against the number of parse processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            default=None,
+            help='Comma-separated parse process counts; 0 parses on threads (default: 0,1,2,4... up to the CPU count)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=240,
+            help='Listing pages per run, cycling through the fixtures (default: 240)'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['lxml', 'bs4'],
+            default=settings.LISTING_PARSER,
+            help=f'Listing parser (default: {settings.LISTING_PARSER})'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0,
+            help='Simulated seconds per fetch (default: 0, fetching always outruns parsing)'
+        )
+
+    def handle(self, *args, **options):
+        # Imported here: the spawned workers import this module before Django is set up
+        from cars.parser_integration import parse_car_html
+
+        listings = []
+        for filename in sorted(os.listdir(FIXTURES_DIR)):
+            if filename.startswith('auto_') and filename.endswith('.html'):
+                with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+                    listings.append(f.read())
+        if not listings:
+            raise CommandError(f"No listing pages in {FIXTURES_DIR}")
+
+        cpus = os.cpu_count() or 1
+        if options['workers']:
+            counts = [int(count) for count in options['workers'].split(',')]
+        else:
+            counts = [0] + [count for count in (1, 2, 4, 8, 16, 32) if count < cpus] + [cpus]
+        parse = partial(parse_car_html, engine=options['engine'])
+
+        self.stdout.write(
+            f"{options['pages']} pages, {options['engine']} parser, {cpus} CPUs, "
+            f"backlog {settings.SCRAPER_PARSE_BACKLOG} pages"
+        )
+        self.stdout.write(f"{'workers':<9} {'seconds':>8} {'pages/s':>9} {'speedup':>8} {'per worker':>11} {'stalls':>7}")
+        baseline = None
+        parsed_counts = set()
+        for count in dict.fromkeys(counts):
+            executor = parse_pool(count, initializer=quiet_worker)
+            try:
+                if executor is not None:
+                    # Start every process and set Django up outside the timing
+                    for future in [executor.submit(time.sleep, 0.5) for _ in range(count)]:
+                        future.result()
+                fetcher = FixtureFetcher(listings, options['pages'], options['latency'])
+                scraper = ListingScraper(
+                    fetcher, 'fixture://search?page=1', fetcher.extract_links, parse,
+                    executor=executor, parse_workers=count or None,
+                )
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    cars = asyncio.run(scraper.run(options['pages']))
+                    seconds = time.perf_counter() - start
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+            parsed_counts.add(len(cars))
+            rate = options['pages'] / seconds
+            if count == 1:
+                baseline = rate
+            label = f'{count}' if count else 'threads'
+            speedup = f'{rate / baseline:.2f}x' if baseline else '-'
+            per_worker = f'{rate / baseline / count:.0%}' if baseline and count else '-'
+            self.stdout.write(
+                f"{label:<9} {seconds:>8.2f} {rate:>9.1f} {speedup:>8} {per_worker:>11} {scraper.stats['parse_stalls']:>7}"
+            )
+
+        if len(parsed_counts) != 1:
+            raise CommandError(f"Runs parsed different numbers of cars: {sorted(parsed_counts)}")
+        self.stdout.write(self.style.SUCCESS(
+            "Speedup is against one parse process; stalls count fetched pages that waited for a full backlog"
+        ))
@@ -0,0 +1,71 @@
+import contextlib
+import os
+import resource
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from cars.downloader import ImageDownloader, discard_unused
+from cars.management.commands.mock_autoria import add_mock_arguments, mock_options
+from cars.mockserver import MockAutoRia
+from cars.parser_integration import scrape_cars
+
+
+@contextlib.contextmanager
+def silenced_stdout():
+    """Discard the scraper's per-field prints, the parse processes' included"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+class Command(BaseCommand):
+    help = 'Scrape a local auto.ria.com stand-in and report throughput, retries and memory'
+
+    def add_arguments(self, parser):
+        add_mock_arguments(parser)
+        parser.add_argument('--limit', type=int, default=None, help='Listings to scrape (default: all of them)')
+        parser.add_argument('--rate', type=float, default=1000, help='Scraper requests per second (default: 1000)')
+        parser.add_argument('--concurrency', type=int, default=None, help='Scraper connection pool size (default: SCRAPER_CONCURRENCY)')
+        parser.add_argument('--images', action='store_true', help='Download the photos too')
+        parser.add_argument('--cache', action='store_true', help='Go through the HTTP cache (SCRAPER_CACHE_DIR)')
+
+    def handle(self, *args, **options):
+        limit = options['limit'] or options['listings']
+        counters = {}
+        fetcher_options = {'rate': options['rate'], 'burst': max(1, int(options['rate']))}
+        if options['concurrency']:
+            fetcher_options['concurrency'] = options['concurrency']
+        # Nothing is written to the database; only the scrape and download stages run
+        with MockAutoRia(**mock_options(options)) as server, contextlib.ExitStack() as stack:
+            stack.enter_context(override_settings(AUTORIA_URL=server.url))
+            if not options['cache']:
+                stack.enter_context(override_settings(SCRAPER_CACHE_DIR=''))
+            with silenced_stdout():
+                start = time.perf_counter()
+                cars = scrape_cars(limit=limit, progress=counters.update, **fetcher_options)
+                scraped = time.perf_counter() - start
+                downloaded = 0
+                if options['images']:
+                    with ImageDownloader() as downloader:
+                        downloads = downloader.download_all(url for car in cars for url in car['image_urls'])
+                    downloaded = sum(image is not None for image in downloads.values())
+                    discard_unused(downloads)
+                total = time.perf_counter() - start
+
+        self.stdout.write(f"Scraped {len(cars)}/{limit} listings in {scraped:.1f}s: {len(cars) / scraped:.1f} listings/s")
+        if options['images']:
+            self.stdout.write(f"Downloaded {downloaded} photos, {total - scraped:.1f}s, {downloader.stats['retries']} retries")
+        self.stdout.write(f"Scraper: {counters}")
+        self.stdout.write(f"Server: {server.stats}")
+        # ru_maxrss is in kilobytes on Linux
+        self.stdout.write(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
@@ -0,0 +1,143 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from cars.models import Car
+from cars.views import CarViewSet
+
+User = get_user_model()
+
+# Query strings mirroring what the frontend sends to /api/cars/
+CANONICAL_QUERIES = [
+    '',
+    'make=Toyota',
+    'make=Toyota&model=RAV4',
+    'fuel_type=electric',
+    'body_type=pickup',
+    'condition=damaged',
+    'city=Lviv',
+    'country=Ukraine&city=Lviv',
+    'min_price=20000&max_price=21000',
+    'min_year=2001&max_year=2002',
+    'min_mileage=1000&max_mileage=2000',
+    'ordering=price',
+    'ordering=-price',
+    'ordering=year',
+    'ordering=-mileage',
+]
+
+MAKES = {
+    'Toyota': ['RAV4', 'Land Cruiser', 'Highlander'],
+    'Mitsubishi': ['Pajero', 'Outlander', 'L200'],
+    'Nissan': ['Patrol', 'X-Trail', 'Navara'],
+    'Volkswagen': ['Touareg', 'Tiguan', 'Amarok'],
+    'Land Rover': ['Defender', 'Discovery'],
+    'Ford': ['Ranger', 'Explorer'],
+}
+CITIES = ['Kyiv', 'Lviv', 'Kharkiv', 'Odesa', 'Dnipro', 'Zaporizhzhia', 'Vinnytsia', 'Poltava']
+
+
+class RollbackDataset(Exception):
+    """Raised to discard the generated dataset once the plans have been checked"""
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the canonical car API queries on a generated dataset and fail on sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=50000,
+            help='Number of synthetic cars to generate (default: 50000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='bulk_create batch size used to generate the dataset'
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                self.generate_dataset(options['rows'], options['batch_size'])
+                for query in CANONICAL_QUERIES:
+                    plan = self.explain(query)
+                    if self.is_sequential_scan(plan):
+                        failures.append(query)
+                        self.stdout.write(self.style.ERROR(f"SEQ SCAN  /api/cars/?{query}"))
+                        self.stdout.write(plan)
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f"index     /api/cars/?{query}"))
+                raise RollbackDataset()
+        except RollbackDataset:
+            pass
+
+        if failures:
+            raise CommandError(f"{len(failures)} canonical queries fall back to a sequential scan")
+        self.stdout.write(self.style.SUCCESS(f"All {len(CANONICAL_QUERIES)} canonical queries use an index"))
+
+    def generate_dataset(self, rows, batch_size):
+        self.stdout.write(f"Generating {rows} synthetic cars...")
+        rng = random.Random(42)
+        seller = User.objects.create(username='index-check-seller')
+        makes = list(MAKES)
+        batch = []
+        for _ in range(rows):
+            make = rng.choice(makes)
+            batch.append(Car(
+                seller=seller,
+                make=make,
+                model=rng.choice(MAKES[make]),
+                year=rng.randint(1995, 2025),
+                mileage=rng.randint(0, 400000),
+                vehicle_type='SUV',
+                condition=rng.choices(['used', 'new', 'damaged'], weights=[90, 8, 2])[0],
+                fuel_type=rng.choices(['diesel', 'gasoline', 'gas', 'hybrid', 'electric'], weights=[45, 40, 10, 4, 1])[0],
+                transmission=rng.choice(['manual', 'automatic']),
+                body_type=rng.choices(['suv', 'pickup', None], weights=[85, 5, 10])[0],
+                country='Ukraine',
+                city=rng.choice(CITIES),
+                price=Decimal(rng.randint(3000, 90000)),
+                description='',
+            ))
+            if len(batch) >= batch_size:
+                Car.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Car.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def explain(self, query):
+        """Build the list queryset exactly as CarViewSet does and EXPLAIN its first page"""
+        view = CarViewSet(action='list', format_kwarg=None, args=(), kwargs={})
+        view.request = Request(RequestFactory().get('/api/cars/', data=self.parse_query(query)))
+        queryset = view.filter_queryset(view.get_queryset())
+        page_size = view.paginator.page_size or 10
+        return queryset[:page_size].explain()
+
+    @staticmethod
+    def parse_query(query):
+        return dict(pair.split('=', 1) for pair in query.split('&') if pair)
+
+    @staticmethod
+    def is_sequential_scan(plan):
+        table = Car._meta.db_table
+        for line in plan.splitlines():
+            if connection.vendor == 'postgresql':
+                if f'Seq Scan on {table}' in line:
+                    return True
+            # SQLite reports "SCAN cars_car" for a full table scan and
+            # "SCAN cars_car USING INDEX ..." / "SEARCH ..." otherwise
+            elif line.rstrip().endswith(f'SCAN {table}'):
+                return True
+        return False
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from cars.models import Car, CarImage
+
+User = get_user_model()
+
+PAGE_SIZES = [1, 10, 50]
+
+
+class RollbackDataset(Exception):
+    """Raised to discard the generated cars once the queries have been counted"""
+
+
+class Command(BaseCommand):
+    help = 'Fail if the number of queries behind a car list page depends on the page size'
+
+    def handle(self, *args, **options):
+        counts = {}
+        try:
+            with transaction.atomic():
+                self.generate_dataset(max(PAGE_SIZES) + 5)
+                client = APIClient()
+                for page_size in PAGE_SIZES:
+                    with CaptureQueriesContext(connection) as context:
+                        response = client.get(
+                            '/api/cars/',
+                            {'pagination': 'cursor', 'page_size': page_size},
+                            HTTP_HOST='localhost',
+                        )
+                    if response.status_code != 200:
+                        raise CommandError(f"/api/cars/ returned {response.status_code}")
+                    counts[page_size] = len(context.captured_queries)
+                    self.stdout.write(f"page_size={page_size:<3} -> {counts[page_size]} queries")
+                raise RollbackDataset()
+        except RollbackDataset:
+            pass
+
+        if len(set(counts.values())) != 1:
+            raise CommandError(f"List query count depends on page size: {counts}")
+        self.stdout.write(self.style.SUCCESS(f"List pages cost {counts[PAGE_SIZES[0]]} queries at every page size"))
+
+    def generate_dataset(self, cars):
+        seller = User.objects.create(username='list-queries-seller')
+        for i in range(cars):
+            car = Car.objects.create(
+                seller=seller, make='Toyota', model='RAV4', year=2015, mileage=1000 * i,
+                vehicle_type='SUV', condition='used', fuel_type='diesel', transmission='manual',
+                country='Ukraine', city='Kyiv', price=10000 + i,
+            )
+            # Vary the number of images per car so per-row lookups would show up
+            for j in range(i % 3):
+                CarImage.objects.create(car=car, image=f'car_images/check-{i}-{j}.jpg', is_primary=(j == 0))
@@ -0,0 +1,118 @@
+import os
+import re
+import shutil
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from cars.cache import invalidate_car
+from cars.models import Car, CarImage
+from cars.storage import RELEASE_GRACE, content_digest, content_name
+
+CONTENT_ADDRESSED_RE = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+# Files this recent may belong to an upload whose row is not committed yet
+ORPHAN_MIN_AGE = RELEASE_GRACE
+
+
+class Command(BaseCommand):
+    help = 'Move existing car photos to content-addressed names and merge duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without touching files or rows'
+        )
+        parser.add_argument(
+            '--delete-orphans',
+            action='store_true',
+            help='Also delete files under the image directory that no CarImage references'
+        )
+
+    def handle(self, *args, **options):
+        field = CarImage._meta.get_field('image')
+        self.storage = field.storage
+        self.directory = field.upload_to.rstrip('/')
+        self.dry_run = options['dry_run']
+        stats = {'renamed': 0, 'merged': 0, 'missing': 0, 'bytes_saved': 0}
+        targets = set()
+        self.touched_cars = set()
+
+        names = CarImage.objects.order_by('image').values_list('image', flat=True).distinct()
+        for name in names:
+            if not name or self.is_content_addressed(name):
+                continue
+            path = self.storage.path(name)
+            if not os.path.exists(path):
+                self.stdout.write(self.style.WARNING(f"missing  {name}"))
+                stats['missing'] += 1
+                continue
+
+            with open(path, 'rb') as f:
+                target = content_name(self.directory, content_digest(File(f)), name)
+            target_path = self.storage.path(target)
+            duplicate = target in targets or os.path.exists(target_path)
+            targets.add(target)
+            stats['merged' if duplicate else 'renamed'] += 1
+            if duplicate:
+                stats['bytes_saved'] += os.path.getsize(path)
+            self.stdout.write(f"{'merge ' if duplicate else 'rename'}   {name} -> {target}")
+            if not self.dry_run:
+                self.migrate_file(name, path, target, target_path)
+
+        # Row updates skip the signals; refresh validators and cached responses
+        Car.objects.filter(pk__in=self.touched_cars).update(updated_at=timezone.now())
+        for car_id in self.touched_cars:
+            invalidate_car(car_id, rows_changed=False)
+
+        orphans = self.find_orphans()
+        orphan_bytes = sum(os.path.getsize(path) for path in orphans)
+        if options['delete_orphans'] and not self.dry_run:
+            for path in orphans:
+                os.remove(path)
+            stats['bytes_saved'] += orphan_bytes
+
+        prefix = 'Would have: ' if self.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{stats['renamed']} renamed, {stats['merged']} merged into an identical file, "
+            f"{stats['missing']} missing, {len(orphans)} orphaned files ({orphan_bytes} bytes)"
+            f"{' deleted' if options['delete_orphans'] else ''}; {stats['bytes_saved']} bytes saved"
+        ))
+
+    def is_content_addressed(self, name):
+        relative = os.path.relpath(name, self.directory).replace(os.sep, '/')
+        return bool(CONTENT_ADDRESSED_RE.match(relative))
+
+    def migrate_file(self, name, path, target, target_path):
+        # Link (or copy) first, repoint the rows, and only then remove the old
+        # name, so an interrupted run never leaves a row without its file
+        if not os.path.exists(target_path):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            try:
+                os.link(path, target_path)
+            except OSError:
+                shutil.copy2(path, target_path)
+        with transaction.atomic():
+            images = CarImage.objects.filter(image=name)
+            self.touched_cars.update(images.values_list('car_id', flat=True))
+            images.update(image=target)
+        os.remove(path)
+
+    def find_orphans(self):
+        root = self.storage.path(self.directory)
+        referenced = {
+            self.storage.path(name)
+            for name in CarImage.objects.values_list('image', flat=True).distinct()
+            if name
+        }
+        cutoff = time.time() - ORPHAN_MIN_AGE
+        orphans = []
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                if path not in referenced and os.path.getmtime(path) < cutoff:
+                    orphans.append(path)
+        return orphans
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cars import derivatives
+from cars.models import CarImage
+
+
+class Command(BaseCommand):
+    help = 'Compute the inline blur-up placeholders of car photos that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Also recompute existing placeholders'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Photos rendered and saved per batch (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        images = CarImage.objects.exclude(image='')
+        if not options['all']:
+            images = images.filter(placeholder='')
+        names = list(images.order_by('image').values_list('image', flat=True).distinct())
+        if not names:
+            self.stdout.write(self.style.SUCCESS("Every photo already has a placeholder"))
+            return
+
+        self.stdout.write(f"Computing placeholders of {len(names)} photos...")
+        storage = CarImage._meta.get_field('image').storage
+        executor = derivatives.get_executor()
+        started = time.monotonic()
+        done = failed = 0
+        for start in range(0, len(names), options['batch_size']):
+            batch = names[start:start + options['batch_size']]
+            futures = [executor.submit(derivatives.render_placeholder, storage.path(name)) for name in batch]
+            results = {}
+            for name, future in zip(batch, futures):
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"{name}: {e}"))
+                    failed += 1
+
+            with transaction.atomic():
+                for name, placeholder in results.items():
+                    CarImage.objects.filter(image=name).update(placeholder=placeholder)
+                car_ids = set(CarImage.objects.filter(image__in=list(results)).values_list('car_id', flat=True))
+                derivatives.touch_cars(car_ids)
+            done += len(batch)
+            self.stdout.write(f"  {done}/{len(names)}")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed {len(names) - failed} placeholders in {elapsed:.1f}s "
+            f"({len(names) / elapsed:.1f} photos/s), {failed} failed"
+        ))
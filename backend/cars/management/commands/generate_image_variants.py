@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from cars import derivatives
+from cars.models import CarImage
+
+
+class Command(BaseCommand):
+    help = 'Render the resized WebP/JPEG derivatives of car photos that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Also re-render images that already have derivatives'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Only process this many distinct photos'
+        )
+
+    def handle(self, *args, **options):
+        images = CarImage.objects.exclude(image='')
+        if not options['all']:
+            images = images.filter(variants={})
+        names = list(images.order_by('image').values_list('image', flat=True).distinct()[:options['limit']])
+        if not names:
+            self.stdout.write(self.style.SUCCESS("Every photo already has its derivatives"))
+            return
+
+        self.stdout.write(f"Rendering derivatives of {len(names)} photos...")
+        started = time.monotonic()
+        futures = derivatives.schedule(names)
+        failed = 0
+        for done, future in enumerate(as_completed(futures), 1):
+            if future.exception() is not None:
+                failed += 1
+            if done % 50 == 0 or done == len(futures):
+                self.stdout.write(f"  {done}/{len(futures)}")
+        derivatives.wait()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {len(names) - failed} photos in {elapsed:.1f}s "
+            f"({len(names) / elapsed:.1f} photos/s), {failed} failed"
+        ))
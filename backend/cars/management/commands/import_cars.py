@@ -11,8 +11,10 @@ import tempfile
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
+from cars import derivatives, journal
+from cars.bulk import BulkCarWriter
 from cars.parser_integration import import_cars_sync
-from cars.models import Car, CarImage
+from cars.models import Car, CarImage, ImportRun
 
 class Command(BaseCommand):
     help = 'Import cars from auto.ria.com'
@@ -30,6 +32,27 @@ class Command(BaseCommand):
             default=1,
             help='User ID to use as the seller (default: 1)'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Upsert listings by URL instead of deleting all cars first'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the latest interrupted import run instead of starting a new one'
+        )
+        parser.add_argument(
+            '--run',
+            type=int,
+            help='ID of the import run to continue'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            nargs='*',
+            metavar='URL',
+            help='Fetch the failed listings of the resumed run again (all of them, or just these URLs)'
+        )
 
     def handle(self, *args, **options):
         """
@@ -37,12 +60,36 @@ class Command(BaseCommand):
         """
         limit = options['limit']
         user_id = options['user_id']
-        
-        self.stdout.write(f"Starting import of {limit} cars...")
-        
+
+        run = None
+        if options['run'] is not None:
+            run = ImportRun.objects.filter(pk=options['run']).first()
+            if run is None:
+                self.stdout.write(self.style.ERROR(f"Import run {options['run']} does not exist"))
+                return
+        elif options['resume'] or options['retry_failed'] is not None:
+            # Failed listings of a completed run can be retried too
+            run = journal.resumable_run(completed=options['retry_failed'] is not None)
+            if run is None:
+                self.stdout.write(self.style.ERROR("No import run to resume"))
+                return
+        if run is not None:
+            if options['retry_failed'] is not None:
+                retried = journal.retry_failed(run, options['retry_failed'] or None)
+                self.stdout.write(f"Retrying {retried} failed listings")
+                run.refresh_from_db()
+            if run.status == ImportRun.STATUS_COMPLETED:
+                self.stdout.write(self.style.WARNING(f"Import run {run.pk} already completed"))
+                return
+            self.stdout.write(f"Resuming import run {run.pk}: {journal.summary(run)}")
+        else:
+            self.stdout.write(f"Starting import of {limit} cars...")
+
         try:
             # Use the improved import_cars_sync function
-            count = import_cars_sync(limit=limit, admin_user_id=user_id)
+            count = import_cars_sync(limit=limit, admin_user_id=user_id, incremental=options['incremental'], run=run)
+            # Let the image derivatives queued by the import finish before exiting
+            derivatives.wait()
             self.stdout.write(self.style.SUCCESS(f"Successfully imported {count} cars"))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error during import: {str(e)}"))
@@ -92,7 +139,7 @@ class Command(BaseCommand):
     def parse_cars(self, limit=20):
         """Parse cars from auto.ria.com"""
         headers = {"User-Agent": "Mozilla/5.0"}
-        base_url = 'https://auto.ria.com/uk/search/?indexName=auto&body.id[0]=5&category_id=1&page=1'
+        base_url = settings.AUTORIA_URL + '/uk/search/?indexName=auto&body.id[0]=5&category_id=1&page=1'
 
         cars_data = []
 
@@ -103,7 +150,7 @@ class Command(BaseCommand):
             links = []
             for a in soup.select('a.address[href]'):
                 href = a['href']
-                if href.startswith('https://auto.ria.com'):
+                if href.startswith(settings.AUTORIA_URL):
                     links.append(href)
                 if len(links) >= limit:
                     break
@@ -303,9 +350,11 @@ class Command(BaseCommand):
             admin_user.save()
             self.stdout.write(self.style.SUCCESS("Created admin user"))
 
-        # Import each car to Django models
+        # Import each car to Django models, skipping make/model pairs that
+        # already exist (as get_or_create did) and writing in batches
         counter = 0
-        with transaction.atomic():
+        existing = set(Car.objects.values_list('make', 'model'))
+        with transaction.atomic(), BulkCarWriter() as writer:
             for car_data in cars_data:
                 # Extract data from parser record
                 name_parts = car_data['name'].split()
@@ -318,30 +367,30 @@ class Command(BaseCommand):
                     make = car_data['name']
                     model = 'Unknown'
 
-                # Get or create car in Django database
-                car, created = Car.objects.get_or_create(
+                if (make, model) in existing:
+                    continue
+                existing.add((make, model))
+
+                writer.create(Car(
                     make=make,
                     model=model,
-                    defaults={
-                        'year': int(car_data['year']) if car_data['year'].isdigit() else 2020,
-                        'mileage': int(car_data['mileage']),
-                        'vehicle_type': 'suv',  # Default SUV since most are SUVs
-                        'condition': self.get_condition_mapping(car_data['condition']),
-                        'fuel_type': self.get_fuel_type_mapping(car_data['fuel_type']),
-                        'transmission': self.get_transmission_mapping(car_data['transmission']),
-                        'body_type': self.get_body_type_mapping(car_data['body_type']),
-                        'country': 'Ukraine',  # Default country
-                        'city': 'Kyiv',  # Default city
-                        'price': float(car_data['price']),
-                        'negotiable': True,  # Default to negotiable
-                        'description': car_data['description'],
-                        'seller': admin_user,
-                    }
-                )
-
-                if created:
-                    counter += 1
-                    self.stdout.write(f"Imported: {car.make} {car.model} ({car.year})")
+                    year=int(car_data['year']) if car_data['year'].isdigit() else 2020,
+                    mileage=int(car_data['mileage']),
+                    vehicle_type='suv',  # Default SUV since most are SUVs
+                    condition=self.get_condition_mapping(car_data['condition']),
+                    fuel_type=self.get_fuel_type_mapping(car_data['fuel_type']),
+                    transmission=self.get_transmission_mapping(car_data['transmission']),
+                    body_type=self.get_body_type_mapping(car_data['body_type']),
+                    country='Ukraine',  # Default country
+                    city='Kyiv',  # Default city
+                    price=float(car_data['price']),
+                    negotiable=True,  # Default to negotiable
+                    description=car_data['description'],
+                    seller=admin_user,
+                ))
+                counter += 1
+                self.stdout.write(f"Imported: {make} {model} ({car_data['year']})")
+        self.stdout.write(f"Bulk writer: {writer.report()}")
 
         conn.close()
         return counter
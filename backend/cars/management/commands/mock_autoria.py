@@ -0,0 +1,47 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from cars.mockserver import MockAutoRia
+
+
+def add_mock_arguments(parser):
+    """Options of the generated site, shared with benchmark_scraper"""
+    parser.add_argument('--listings', type=int, default=10000, help='Listings on the site (default: 10000)')
+    parser.add_argument('--per-page', type=int, default=20, help='Listings per search page (default: 20)')
+    parser.add_argument('--photos', type=int, default=5, help='Photos per listing (default: 5)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many more seconds at random (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 5xx (default: 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with a 429 (default: 0)')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with a 429 (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated data and faults (default: 0)')
+
+
+def mock_options(options):
+    return {
+        name: options[name]
+        for name in ('listings', 'per_page', 'photos', 'latency', 'jitter', 'error_rate', 'throttle_rate', 'retry_after', 'seed')
+    }
+
+
+class Command(BaseCommand):
+    help = 'Serve a generated stand-in for auto.ria.com (see cars.mockserver)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+        add_mock_arguments(parser)
+
+    def handle(self, *args, **options):
+        server = MockAutoRia(host=options['host'], port=options['port'], **mock_options(options))
+        server.start()
+        self.stdout.write(self.style.SUCCESS(f"Serving {options['listings']} listings at {server.url}"))
+        self.stdout.write(f"Run imports against it with AUTORIA_URL={server.url}; Ctrl-C stops")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.stdout.write(f"Served: {server.stats}")
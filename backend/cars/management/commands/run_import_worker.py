@@ -0,0 +1,84 @@
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from cars import derivatives, jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued auto.ria.com import jobs (see cars.jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.IMPORT_WORKER_CONCURRENCY,
+            help=f'Jobs run at the same time (default: {settings.IMPORT_WORKER_CONCURRENCY})'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.IMPORT_WORKER_POLL_INTERVAL,
+            help=f'Seconds between checks for new jobs (default: {settings.IMPORT_WORKER_POLL_INTERVAL})'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for more jobs'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        if connection.vendor == 'sqlite' and concurrency > 1:
+            # Overlapping import transactions fail with "database is locked"
+            self.stdout.write(self.style.WARNING("SQLite allows a single writer, running one job at a time"))
+            concurrency = 1
+        if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+            # The web processes would keep serving cached cars and indexes
+            self.stdout.write(self.style.WARNING(
+                "The cache is local to this process, web processes will not see the imports; "
+                "configure a shared cache (CACHE_DIR or REDIS_URL)"
+            ))
+        worker = jobs.worker_name()
+        self.stopping = threading.Event()
+        # Finish the running jobs on SIGTERM/SIGINT instead of abandoning them
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        self.stdout.write(f"Import worker {worker} started with concurrency {concurrency}")
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='import-job') as pool:
+            while not self.stopping.is_set():
+                close_old_connections()
+                requeued = jobs.requeue_stale()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f"Requeued {requeued} jobs of unresponsive workers"))
+                while len(running) < concurrency:
+                    job = jobs.claim(worker)
+                    if job is None:
+                        break
+                    self.stdout.write(f"Claimed import job {job.pk}")
+                    running.add(pool.submit(jobs.run_job, job))
+
+                if options['once'] and not running:
+                    break
+                if running:
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is not None:
+                            self.stdout.write(self.style.ERROR(f"Import job crashed: {future.exception()}"))
+                else:
+                    self.stopping.wait(options['poll_interval'])
+
+            if running:
+                self.stdout.write(f"Waiting for {len(running)} running jobs...")
+                wait(running)
+        derivatives.wait()
+        self.stdout.write(self.style.SUCCESS(f"Import worker {worker} stopped"))
+
+    def stop(self, signum, frame):
+        self.stopping.set()
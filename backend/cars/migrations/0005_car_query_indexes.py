@@ -0,0 +1,57 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0004_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-created_at', '-id'], name='car_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['make', 'model', '-created_at'], name='car_make_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['fuel_type', '-created_at'], name='car_fuel_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['condition', '-created_at'], name='car_condition_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['city', '-created_at'], name='car_city_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('body_type__isnull', False)), fields=['body_type', '-created_at'], name='car_body_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['price', 'id'], name='car_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['year', 'id'], name='car_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['mileage', 'id'], name='car_mileage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_imported', True)), fields=['original_url'], name='car_imported_url_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carimage',
+            index=models.Index(condition=models.Q(('is_primary', True)), fields=['car'], name='carimage_primary_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Make/model are indexed with weight A and the description with weight C/D.
+# Imported listings mix Ukrainian and English; PostgreSQL ships no Ukrainian
+# stemmer, so every column is indexed both with the 'english' configuration
+# (stemmed English words) and the 'simple' one (lower-cased tokens, which the
+# search backend matches by prefix to cope with Ukrainian inflection).
+CREATE_TRIGGER = [
+    """
+CREATE OR REPLACE FUNCTION cars_car_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.make, '') || ' ' || coalesce(NEW.model, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.make, '') || ' ' || coalesce(NEW.model, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+    """,
+    """
+CREATE TRIGGER cars_car_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF make, model, description ON cars_car
+    FOR EACH ROW EXECUTE FUNCTION cars_car_search_vector_update()
+    """,
+    "UPDATE cars_car SET make = make",
+    "CREATE INDEX car_search_vector_idx ON cars_car USING gin (search_vector)",
+]
+
+DROP_TRIGGER = [
+    "DROP INDEX IF EXISTS car_search_vector_idx",
+    "DROP TRIGGER IF EXISTS cars_car_search_vector_trigger ON cars_car",
+    "DROP FUNCTION IF EXISTS cars_car_search_vector_update()",
+]
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE_TRIGGER:
+            schema_editor.execute(statement)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_TRIGGER:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0005_car_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
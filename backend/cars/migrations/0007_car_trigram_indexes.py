@@ -0,0 +1,37 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS car_make_trgm_idx ON cars_car USING gin (make gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS car_model_trgm_idx ON cars_car USING gin (model gin_trgm_ops)",
+]
+
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS car_make_trgm_idx",
+    "DROP INDEX IF EXISTS car_model_trgm_idx",
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE_INDEXES:
+            schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_INDEXES:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0006_car_search_vector'),
+    ]
+
+    operations = [
+        # No-op on SQLite, where cars.fuzzy uses its in-process trigram index
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
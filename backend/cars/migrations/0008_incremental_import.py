@@ -0,0 +1,55 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:36
+
+from django.db import migrations, models
+
+
+def check_duplicate_imports(apps, schema_editor):
+    # Deleting here would skip the signals that release photo files and
+    # invalidate caches, so duplicates are left for the operator to remove
+    Car = apps.get_model('cars', 'Car')
+    seen = {}
+    duplicates = []
+    rows = Car.objects.filter(is_imported=True).exclude(original_url=None)
+    for pk, url in rows.order_by('-created_at', '-pk').values_list('pk', 'original_url'):
+        if url in seen:
+            duplicates.append((pk, url))
+        else:
+            seen[url] = pk
+    if duplicates:
+        lines = '\n'.join(f'  car {pk} duplicates car {seen[url]}: {url}' for pk, url in duplicates)
+        pks = [pk for pk, _ in duplicates]
+        raise RuntimeError(
+            f"{len(duplicates)} imported cars share an original_url with a newer one, so "
+            f"car_imported_url_uniq cannot be added:\n{lines}\n"
+            f"Delete them with the release that is running now (the admin, or "
+            f"Car.objects.filter(pk__in={pks}).delete() in manage.py shell), then migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0007_car_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_imports, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='car',
+            name='car_imported_url_idx',
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='Is Active'),
+        ),
+        migrations.AddField(
+            model_name='carimage',
+            name='source_url',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='car',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_imported', True)), fields=('original_url',), name='car_imported_url_uniq'),
+        ),
+    ]
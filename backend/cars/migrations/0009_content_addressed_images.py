@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:45
+
+import cars.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0008_incremental_import'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='carimage',
+            name='image',
+            field=models.ImageField(db_index=True, storage=cars.storage.ContentAddressedStorage(), upload_to='car_images/'),
+        ),
+    ]
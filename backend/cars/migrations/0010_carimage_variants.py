@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0009_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
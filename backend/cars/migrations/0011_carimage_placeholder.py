@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0010_carimage_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carimage',
+            name='placeholder',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
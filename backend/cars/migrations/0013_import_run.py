@@ -0,0 +1,55 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0012_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('interrupted', 'Interrupted'), ('completed', 'Completed')], default='running', max_length=20)),
+                ('limit', models.PositiveIntegerField()),
+                ('incremental', models.BooleanField(default=False)),
+                ('last_page', models.PositiveIntegerField(default=0)),
+                ('discovery_complete', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='runs', to='cars.importjob')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportRunURL',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('page', models.PositiveIntegerField(default=0)),
+                ('state', models.CharField(choices=[('discovered', 'Discovered'), ('fetched', 'Fetched'), ('parsed', 'Parsed'), ('stored', 'Stored'), ('failed', 'Failed')], default='discovered', max_length=20)),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='urls', to='cars.importrun')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['run', 'state'], name='importrunurl_state_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importrunurl',
+            constraint=models.UniqueConstraint(fields=('run', 'url'), name='importrunurl_run_url_uniq'),
+        ),
+    ]
@@ -0,0 +1,282 @@
+"""
+Local stand-in for auto.ria.com, for load tests and offline imports.
+
+MockAutoRia serves paginated SUV search results, listing pages and photos
+over HTTP from a background thread. Everything is generated from the
+listing number and `seed`: the same listing always has the same car, the
+same markup and the same photos, so runs can be compared. Pages are rendered
+from the templates in cars/templates/mock_autoria/ with the markup the
+extractors in cars.extract and parser_integration look for. Photos are a
+handful of pre-rendered JPEGs made unique per URL by bytes appended after
+the end-of-image marker, so content-addressed storage does not fold them
+together.
+
+Latency, 5xx errors and 429 responses with Retry-After can be injected.
+Whether a request fails depends only on the seed, the path and how often
+that path was requested before, not on the order in which concurrent
+requests arrive. Listings and photos carry ETags and answer If-None-Match
+with 304, as the HTTP cache expects.
+
+    with MockAutoRia(listings=10000, throttle_rate=0.05) as server:
+        with override_settings(AUTORIA_URL=server.url):
+            scrape_cars(limit=10000)
+
+`manage.py mock_autoria` runs one in the foreground.
+"""
+import io
+import json
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+from PIL import Image, ImageDraw
+
+CATALOG = {
+    'Toyota': ['Land Cruiser Prado', 'RAV4', 'Highlander', 'Land Cruiser'],
+    'BMW': ['X5', 'X3', 'X6', 'XM'],
+    'Audi': ['Q7', 'Q5', 'Q8', 'e-tron'],
+    'Volkswagen': ['Touareg', 'Tiguan', 'ID.4'],
+    'Mercedes-Benz': ['G-Class', 'GLE-Class', 'GLC-Class', 'ML'],
+    'Nissan': ['Rogue', 'X-Trail', 'Qashqai', 'Pathfinder'],
+    'Hyundai': ['Kona', 'Tucson', 'Santa Fe'],
+    'Kia': ['Sportage', 'Sorento'],
+    'Mazda': ['CX-5', 'CX-9', 'CX-30'],
+    'Porsche': ['Cayenne', 'Macan'],
+    'Land Rover': ['Range Rover Sport', 'Discovery', 'Defender'],
+    'Lexus': ['RX', 'GX', 'NX'],
+    'Mitsubishi': ['Outlander', 'Pajero Sport'],
+    'Subaru': ['Forester', 'Outback'],
+    'Volvo': ['XC90', 'XC60'],
+    'Jeep': ['Grand Cherokee', 'Compass', 'Wrangler'],
+}
+CATALOG_ITEMS = sorted(CATALOG.items())
+CITIES = ['Київ', 'Львів', 'Одеса', 'Дніпро', 'Харків', 'Вінниця', 'Івано-Франківськ', 'Житомир', 'Рівне', 'Тернопіль']
+FUELS = ['Бензин', 'Дизель', 'Газ / Бензин', 'Гібрид (HEV)', 'Електро']
+TRANSMISSIONS = ['Автомат', 'Ручна / Механіка', 'Робот', 'Типтронік']
+CONDITIONS = ['Повністю непошкоджене', 'Професійно відремонтовані пошкодження', 'Пошкоджене, після ДТП']
+DESCRIPTION_SENTENCES = [
+    'Автомобіль в гарному технічному стані.',
+    'Офіційний, один власник.',
+    'Сервісна історія, всі ТО вчасно.',
+    'Не фарбований, рідний пробіг.',
+    'Зимова гума в подарунок.',
+    'Можливий обмін на дешевше авто.',
+    'Торг біля авто.',
+    'Повна комплектація: панорама, шкіра, камера 360.',
+    'Нова гума, замінено мастило у всіх агрегатах.',
+    'Пригнаний з Європи, розмитнений.',
+]
+PHOTO_SIZE = (620, 465)
+PHOTO_TEMPLATES = 8
+LISTING_RE = re.compile(r'^/uk/auto_[\w-]+_(?P<id>\d+)\.html$')
+PHOTO_RE = re.compile(r'^/photos/(?P<id>\d+)/(?P<number>\d+)\.jpg$')
+ERROR_STATUSES = (500, 502, 503, 504)
+
+
+def render_photo_templates(seed):
+    """A few JPEGs of about 20-40 KB every photo is made from"""
+    rnd = random.Random(seed)
+    photos = []
+    for number in range(PHOTO_TEMPLATES):
+        image = Image.new('RGB', PHOTO_SIZE, tuple(rnd.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = rnd.randrange(PHOTO_SIZE[0]), rnd.randrange(PHOTO_SIZE[1])
+            draw.ellipse(
+                (x, y, x + rnd.randrange(20, 200), y + rnd.randrange(20, 150)),
+                fill=tuple(rnd.randrange(256) for _ in range(3)),
+            )
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+class MockAutoRia:
+    """Threaded HTTP server generating auto.ria.com pages; see the module docstring"""
+
+    def __init__(self, listings=1000, per_page=20, photos=5, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=0, host='127.0.0.1', port=0):
+        self.listings = listings
+        self.per_page = per_page
+        self.photos = photos
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.lock = threading.Lock()
+        self.attempts = {}
+        self.stats = {'requests': 0, 'search': 0, 'listing': 0, 'photo': 0, 'not_modified': 0,
+                      'throttled': 0, 'errors': 0, 'not_found': 0, 'bytes': 0}
+        self.photo_templates = render_photo_templates(seed)
+        # Padding that makes each page about as large as a live one
+        models = [f'{make} {model}' for make, names in CATALOG_ITEMS for model in names]
+        self.state = json.dumps({
+            'catalog': [{'id': i, 'name': name, 'count': (i * 7919) % 9000} for i, name in enumerate(models * 8)],
+        }, ensure_ascii=False)
+        self.render_listing = lru_cache(maxsize=1024)(self.render_listing)
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.server.server_address[1] if self.server else self.port}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), MockHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mock-autoria', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def car(self, origin, listing_id):
+        """Seed data of one listing"""
+        rnd = random.Random(f'{self.seed}:{listing_id}')
+        make, models = CATALOG_ITEMS[rnd.randrange(len(CATALOG_ITEMS))]
+        model = rnd.choice(models)
+        name = f'{make} {model}'
+        return {
+            'id': listing_id,
+            'name': name,
+            'url': f'{origin}/uk/auto_{slugify(name).replace("-", "_")}_{listing_id}.html',
+            'year': rnd.randint(2005, 2024),
+            'mileage': rnd.randint(1, 350),
+            'price': f'{rnd.randint(40, 1200) * 100:,}'.replace(',', ' '),
+            'city': rnd.choice(CITIES),
+            'fuel': rnd.choice(FUELS),
+            'engine_size': rnd.choice(['1.6', '2.0', '2.5', '3.0', '4.4']),
+            'power': rnd.randint(120, 620),
+            'transmission': rnd.choice(TRANSMISSIONS),
+            'condition': rnd.choice(CONDITIONS),
+            'description': ' '.join(rnd.sample(DESCRIPTION_SENTENCES, 4)),
+            'photos': [f'{origin}/photos/{listing_id}/{number}.jpg' for number in range(self.photos)],
+        }
+
+    def page_context(self, origin):
+        return {'origin': origin, 'state': self.state, 'catalog': CATALOG_ITEMS, 'footer_links': range(120)}
+
+    def render_search(self, origin, page):
+        first = (page - 1) * self.per_page + 1
+        ids = range(first, min(first + self.per_page, self.listings + 1)) if page >= 1 else []
+        return render_to_string('mock_autoria/search.html', {
+            **self.page_context(origin),
+            'page': page,
+            'cars': [self.car(origin, listing_id) for listing_id in ids],
+            'next_page': page + 1 if first + self.per_page <= self.listings else None,
+        }).encode('utf-8')
+
+    def render_listing(self, origin, listing_id):
+        rnd = random.Random(f'{self.seed}:{listing_id}:recommendations')
+        return render_to_string('mock_autoria/listing.html', {
+            **self.page_context(origin),
+            'car': self.car(origin, listing_id),
+            'recommendations': [
+                self.car(origin, rnd.randint(1, self.listings)) for _ in range(20)
+            ],
+        }).encode('utf-8')
+
+    def photo(self, listing_id, number):
+        template = self.photo_templates[(listing_id + number) % len(self.photo_templates)]
+        # Decoders stop at the end-of-image marker; the tail only changes the hash
+        return template + f'mock:{self.seed}:{listing_id}:{number}'.encode('ascii')
+
+    def fault(self, path):
+        """Injected (status, headers) for this attempt at `path`, or None"""
+        with self.lock:
+            attempt = self.attempts.get(path, 0)
+            self.attempts[path] = attempt + 1
+        rnd = random.Random(f'{self.seed}:{path}:{attempt}')
+        delay = self.latency + (rnd.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        roll = rnd.random()
+        if roll < self.throttle_rate:
+            self.count('throttled')
+            return 429, {'Retry-After': str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            self.count('errors')
+            return rnd.choice(ERROR_STATUSES), {}
+        return None
+
+    def respond(self, path, origin, if_none_match=None):
+        """(status, headers, body) for a GET of `path`"""
+        self.count('requests')
+        fault = self.fault(path)
+        if fault:
+            status, headers = fault
+            return status, headers, b''
+
+        url = urlsplit(path)
+        if url.path == '/uk/search/':
+            page = int(parse_qs(url.query).get('page', ['1'])[0] or 1)
+            self.count('search')
+            return 200, {'Content-Type': 'text/html; charset=utf-8'}, self.render_search(origin, page)
+
+        match = LISTING_RE.match(url.path)
+        if match and 1 <= int(match.group('id')) <= self.listings:
+            listing_id = int(match.group('id'))
+            etag = f'"listing-{self.seed}-{listing_id}"'
+            self.count('listing')
+            if if_none_match == etag:
+                self.count('not_modified')
+                return 304, {'ETag': etag}, b''
+            return 200, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag}, self.render_listing(origin, listing_id)
+
+        match = PHOTO_RE.match(url.path)
+        if match and 1 <= int(match.group('id')) <= self.listings and int(match.group('number')) < self.photos:
+            listing_id, number = int(match.group('id')), int(match.group('number'))
+            etag = f'"photo-{self.seed}-{listing_id}-{number}"'
+            self.count('photo')
+            if if_none_match == etag:
+                self.count('not_modified')
+                return 304, {'ETag': etag}, b''
+            return 200, {'Content-Type': 'image/jpeg', 'ETag': etag}, self.photo(listing_id, number)
+
+        self.count('not_found')
+        return 404, {'Content-Type': 'text/plain'}, b'Not found'
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the scraper's connection pool is exercised as on the live site
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        mock = self.server.mock
+        origin = f"http://{self.headers.get('Host') or mock.url.split('//', 1)[1]}"
+        status, headers, body = mock.respond(self.path, origin, self.headers.get('If-None-Match'))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        mock.count('bytes', len(body))
+
+    def log_message(self, format, *args):
+        pass
@@ -1,7 +1,10 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
+from .storage import car_image_storage
+
 class Car(models.Model):
     """Car model using standard Django ORM for PostgreSQL"""
     # Define choices as tuples for form display
@@ -97,11 +100,43 @@ class Car(models.Model):
     # Original listing data
     original_url = models.URLField(null=True, blank=True, verbose_name=_('Original URL'))
     is_imported = models.BooleanField(default=False, verbose_name=_('Is Imported'))
+    # Imported listings that disappeared from the source are hidden, not deleted
+    is_active = models.BooleanField(default=True, verbose_name=_('Is Active'))
+
+    # Weighted make/model/description lexemes, maintained by a database
+    # trigger on PostgreSQL (see migration 0006) and unused on SQLite
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = _('Car')
         verbose_name_plural = _('Cars')
         ordering = ['-created_at']
+        # Built from the query shapes CarViewSet actually issues: an equality
+        # filter followed by the default -created_at ordering, range filters
+        # and orderings on price/year/mileage (id is the keyset tie-breaker).
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='car_created_idx'),
+            models.Index(fields=['make', 'model', '-created_at'], name='car_make_model_idx'),
+            models.Index(fields=['fuel_type', '-created_at'], name='car_fuel_created_idx'),
+            models.Index(fields=['condition', '-created_at'], name='car_condition_created_idx'),
+            models.Index(fields=['city', '-created_at'], name='car_city_created_idx'),
+            models.Index(
+                fields=['body_type', '-created_at'],
+                name='car_body_created_idx',
+                condition=models.Q(body_type__isnull=False),
+            ),
+            models.Index(fields=['price', 'id'], name='car_price_idx'),
+            models.Index(fields=['year', 'id'], name='car_year_idx'),
+            models.Index(fields=['mileage', 'id'], name='car_mileage_idx'),
+        ]
+        constraints = [
+            # Incremental imports upsert on the listing URL
+            models.UniqueConstraint(
+                fields=['original_url'],
+                name='car_imported_url_uniq',
+                condition=models.Q(is_imported=True),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.year} {self.make} {self.model}"
@@ -114,12 +149,157 @@ class CarImage(models.Model):
         on_delete=models.CASCADE,
         related_name='images'
     )
-    image = models.ImageField(upload_to='car_images/')
+    # Content-addressed and shared between rows with identical photos;
+    # the index backs the reference count in cars.storage.release()
+    image = models.ImageField(upload_to='car_images/', storage=car_image_storage, db_index=True)
     is_primary = models.BooleanField(default=False)
+    # Where an imported photo was downloaded from, so re-imports can skip it
+    source_url = models.URLField(max_length=500, null=True, blank=True)
+    # Resized WebP/JPEG renditions written by cars.derivatives:
+    # {'width', 'height', 'files': {ext: {width: name}}}, empty until rendered
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    # ~20px WebP preview as a data: URI, painted before the photo arrives
+    placeholder = models.TextField(blank=True, default='', editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"Image for {self.car.make} {self.car.model}"
     
     class Meta:
-        ordering = ['-is_primary', '-uploaded_at']
\ No newline at end of file
+        ordering = ['-is_primary', '-uploaded_at']
+        indexes = [
+            models.Index(
+                fields=['car'],
+                name='carimage_primary_idx',
+                condition=models.Q(is_primary=True),
+            ),
+        ]
+
+class ImportJob(models.Model):
+    """An auto.ria.com import queued from the API and run by `manage.py run_import_worker`"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, _('Queued')),
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_SUCCEEDED, _('Succeeded')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    limit = models.PositiveIntegerField(default=5)
+    incremental = models.BooleanField(default=False)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='import_jobs'
+    )
+    # Running counters: pages_fetched, links_found, cars_parsed, errors,
+    # images_stored, cars_saved
+    progress = models.JSONField(default=dict, blank=True)
+    imported_count = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    # host:pid of the worker running the job, and when it last reported in;
+    # a running job whose heartbeat stops is handed to another worker
+    worker = models.CharField(max_length=100, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(
+                fields=['created_at'],
+                name='importjob_queued_idx',
+                condition=models.Q(status='queued'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Import job {self.pk} ({self.status})"
+
+
+class ImportRun(models.Model):
+    """
+    Journal of one import: how far link discovery got and the state of every
+    listing URL, so an interrupted import resumes instead of starting over.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_INTERRUPTED = 'interrupted'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = (
+        (STATUS_RUNNING, _('Running')),
+        (STATUS_INTERRUPTED, _('Interrupted')),
+        (STATUS_COMPLETED, _('Completed')),
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    limit = models.PositiveIntegerField()
+    incremental = models.BooleanField(default=False)
+    job = models.ForeignKey(
+        ImportJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='runs'
+    )
+    # Last search page whose links are journaled, and whether discovery ran
+    # out of search results
+    last_page = models.PositiveIntegerField(default=0)
+    discovery_complete = models.BooleanField(default=False)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import run {self.pk} ({self.status})"
+
+
+class ImportRunURL(models.Model):
+    """A listing URL discovered by an ImportRun and how far it got"""
+    STATE_DISCOVERED = 'discovered'
+    STATE_FETCHED = 'fetched'
+    STATE_PARSED = 'parsed'
+    STATE_STORED = 'stored'
+    STATE_FAILED = 'failed'
+    STATE_CHOICES = (
+        (STATE_DISCOVERED, _('Discovered')),
+        (STATE_FETCHED, _('Fetched')),
+        (STATE_PARSED, _('Parsed')),
+        (STATE_STORED, _('Stored')),
+        (STATE_FAILED, _('Failed')),
+    )
+
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name='urls')
+    url = models.URLField(max_length=500)
+    page = models.PositiveIntegerField(default=0)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=STATE_DISCOVERED)
+    # Parsed car until it is stored, so a resumed run does not fetch it again
+    data = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'url'], name='importrunurl_run_url_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['run', 'state'], name='importrunurl_state_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({self.state})"
@@ -0,0 +1,179 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CarCursorPagination(BasePagination):
+    """
+    Keyset pagination for car listings.
+
+    Works for any ordering the OrderingFilter produces (price, year, mileage,
+    created_at, search relevance) with `id` appended as a tie-breaker, so every page is a single
+    index range scan no matter how deep the client goes. Instead of an exact
+    COUNT(*) the response carries an estimated total.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE or 10
+    max_page_size = 100
+    # On databases without planner estimates we count at most this many rows
+    count_limit = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        self.estimated_total = self.estimate_count(queryset)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(cursor['v'], reverse))
+        order_by = self.reverse_ordering(self.ordering) if reverse else self.ordering
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Ordering applied by the filter backends plus an `id` tie-breaker"""
+        ordering = [
+            field for field in (queryset.query.order_by or queryset.model._meta.ordering)
+            if isinstance(field, str) and field.lstrip('-') not in ('id', 'pk')
+        ]
+        descending = bool(ordering) and ordering[0].startswith('-')
+        ordering.append('-id' if descending else 'id')
+        return ordering
+
+    @staticmethod
+    def reverse_ordering(ordering):
+        return [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+    def keyset_filter(self, values, reverse):
+        """Lexicographic "row after cursor" condition: (a > x) OR (a = x AND b > y) ..."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if payload['o'] != self.ordering or len(payload['v']) != len(self.ordering):
+                raise ValueError('cursor does not match the requested ordering')
+            payload['v'] = [
+                self.to_python(field, value)
+                for field, value in zip(self.ordering, payload['v'])
+            ]
+        except (binascii.Error, UnicodeError, TypeError, KeyError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+    def encode_cursor(self, obj, reverse):
+        values = [self.to_string(obj, field) for field in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_model_field(self, field):
+        """Model field behind an ordering term, or None for annotations such as `relevance`"""
+        try:
+            return self.model._meta.get_field(field.lstrip('-'))
+        except FieldDoesNotExist:
+            return None
+
+    def to_string(self, obj, field):
+        model_field = self.get_model_field(field)
+        if model_field is None:
+            return getattr(obj, field.lstrip('-'))
+        return model_field.value_to_string(obj)
+
+    def to_python(self, field, value):
+        model_field = self.get_model_field(field)
+        if model_field is None:
+            return value
+        return model_field.to_python(value)
+
+    def estimate_count(self, queryset):
+        """Planner row estimate on PostgreSQL, a bounded count elsewhere"""
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.values('pk').query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        return queryset[:self.count_limit].count()
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('estimated_total', self.estimated_total),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'estimated_total': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -1,23 +1,30 @@
 from django.conf import settings
-import requests
 from bs4 import BeautifulSoup
 import re
-import os
-from urllib.parse import urlparse
-from django.core.files.base import ContentFile
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import models, transaction
+from django.utils import timezone
+from decimal import Decimal
+import asyncio
 import random
+import threading
 import time
 import datetime
 from django.core.files.temp import NamedTemporaryFile
 
-from .models import Car, CarImage
+from . import autocomplete, fuzzy, httpcache, journal as run_journal
+from .cache import invalidate_car
+from .bulk import BulkCarWriter
+from .downloader import ImageDownloader, discard_unused
+from .extract import ListingPage, listing_links
+from .models import Car
+from .scraper import AsyncFetcher, ListingScraper, parse_pool
 
 User = get_user_model()
 
 headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-BASE_URL = 'https://auto.ria.com/uk/search/?indexName=auto&body.id[0]=5&category_id=1&page=1'
+# SUV search results, relative to settings.AUTORIA_URL
+SEARCH_PATH = '/uk/search/?indexName=auto&body.id[0]=5&category_id=1&page=1'
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
@@ -26,32 +33,47 @@ USER_AGENTS = [
     "Mozilla/5.0 (iPhone; CPU iPhone OS 14_2 like Mac OS X)",
 ]
 
+def search_url():
+    """First SUV search results page on AUTORIA_URL"""
+    return settings.AUTORIA_URL + SEARCH_PATH
+
+def extract_listing_links(html, engine=None):
+    """Listing URLs found on one search results page, in page order"""
+    if (engine or settings.LISTING_PARSER) != 'bs4':
+        return listing_links(html, settings.AUTORIA_URL)
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for a in soup.select('a.address[href]'):
+        href = a['href']
+        if href.startswith(settings.AUTORIA_URL) and href not in links:
+            links.append(href)
+    return links
+
 def get_suv_links(limit=100):
     """Get links to SUV car listings from auto.ria.com with random delays and headers"""
     links = []
     page = 1
+    cache_stats = {}
 
     while len(links) < limit:
         headers = {
             'User-Agent': random.choice(USER_AGENTS),
         }
-        url = BASE_URL.replace('page=1', f'page={page}')
+        url = search_url().replace('page=1', f'page={page}')
         print(f"[PAGE {page}] Fetching: {url}")
 
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            print(f"→ Status code: {response.status_code}")
+            response = httpcache.get(url, ttl=settings.SCRAPER_CACHE_SEARCH_TTL, stats=cache_stats,
+                                     headers=headers, timeout=10)
+            print(f"→ Status code: {response.status_code} {response.headers.get('X-Cache', '')}")
             response.raise_for_status()
         except Exception as e:
             print(f"❌ Request failed on page {page}: {e}")
             break
 
-        soup = BeautifulSoup(response.text, 'html.parser')
         page_links = []
-
-        for a in soup.select('a.address[href]'):
-            href = a['href']
-            if href.startswith('https://auto.ria.com') and href not in links:
+        for href in extract_listing_links(response.text):
+            if href not in links:
                 page_links.append(href)
                 links.append(href)
                 if len(links) >= limit:
@@ -66,7 +88,7 @@ def get_suv_links(limit=100):
         print(f"⏳ Sleeping for {delay}s")
         time.sleep(delay)
 
-    print(f"🏁 Finished collecting {len(links)} links.")
+    print(f"🏁 Finished collecting {len(links)} links. HTTP cache: {cache_stats}")
     return links[:limit]
 
 def extract_from_labels(soup, label_name):
@@ -218,237 +240,364 @@ def extract_price(soup):
 def parse_car_details(url):
     """Parse car details from auto.ria.com listing"""
     try:
-        r = requests.get(url, headers=headers, timeout=10)
+        r = httpcache.get(url, headers=headers, timeout=10)
         r.raise_for_status()  # Raise exception for HTTP errors
-        soup = BeautifulSoup(r.text, "html.parser")
+    except Exception as e:
+        print(f"Error fetching car details from {url}: {e}")
+        return None
+    return parse_car_html(r.text, url)
+
+class SoupListingPage:
+    """A listing page parsed with BeautifulSoup; cars.extract.ListingPage is the fast equivalent"""
+
+    def __init__(self, html):
+        self.soup = BeautifulSoup(html, "html.parser")
+
+    def title(self):
+        title = self.soup.select_one("h1.head")
+        return title.get_text(strip=True) if title else None
+
+    def mileage_text(self):
+        mileage_tag = self.soup.find("span", string=lambda s: s and "тис. км" in s)
+        return mileage_tag.get_text(strip=True) if mileage_tag else None
 
-        # Title extraction with better error handling
-        title = soup.select_one("h1.head")
-        if not title:
-            print(f"Error: Could not find title element on page {url}")
+    def description(self):
+        return extract_description(self.soup)
+
+    def label(self, label_name):
+        return extract_from_labels(self.soup, label_name)
+
+    def characteristics_texts(self):
+        for elem in self.soup.select("div.car-characteristics, div.technical-info, div.all-parameters"):
+            yield elem.get_text()
+
+    def condition_text(self):
+        condition_tag = self.soup.find("span", class_="label", string=re.compile("Технічний стан", re.IGNORECASE))
+        if not condition_tag:
             return None
-        title_text = title.get_text(strip=True)
-
-        # Extract year with better error handling
-        year_match = re.search(r"\b(19|20)\d{2}\b", title_text)
-        year = int(year_match.group(0)) if year_match else 2020
-        if not year_match:
-            print(f"Warning: Could not extract year from title '{title_text}', using default 2020")
-
-        # Extract make and model with better validation
-        title_parts = title_text.replace(str(year) if year_match else "", "").strip().split()
-        car_make = title_parts[0] if len(title_parts) >= 1 else "Unknown"
-        model = " ".join(title_parts[1:]) if len(title_parts) > 1 else "Unknown"
-        if car_make == "Unknown" or model == "Unknown":
-            print(f"Warning: Incomplete make/model extracted from '{title_text}'")
-
-        # Extract mileage
-        mileage_tag = soup.find("span", string=lambda s: s and "тис. км" in s)
-        mileage = 0
-        if mileage_tag:
-            mileage_text = mileage_tag.get_text(strip=True).replace("тис. км", "").strip()
-            try:
-                mileage = int(float(mileage_text.replace(",", ".")) * 1000)
-            except ValueError:
-                mileage = 0
+        condition_span = condition_tag.find_next("span", class_="argument")
+        return condition_span.get_text(strip=True) if condition_span else ""
 
-        description = extract_description(soup)
+    def price(self):
+        return extract_price(self.soup)
 
-        # Extract fuel type
-        fuel_type_raw = extract_from_labels(soup, "Двигун")
-        # Add a backup method to extract fuel type from other locations
-        if not fuel_type_raw:
-            # Try alternative labels
-            alt_labels = ["Паливо", "Тип палива", "Тип двигуна", "Топливо"]
-            for label in alt_labels:
-                fuel_type_raw = extract_from_labels(soup, label)
-                if fuel_type_raw:
-                    break
-            
-            # If still not found, try to find it in the page content
-            if not fuel_type_raw:
-                for elem in soup.select("div.car-characteristics, div.technical-info, div.all-parameters"):
-                    text = elem.get_text().lower()
-                    if 'бензин' in text:
-                        fuel_type_raw = "бензин"
-                        break
-                    elif 'дизель' in text:
-                        fuel_type_raw = "дизель"
-                        break
-                    elif 'газ' in text:
-                        fuel_type_raw = "газ"
-                        break
-                    elif 'електро' in text or 'электро' in text:
-                        fuel_type_raw = "електро"
-                        break
-                    elif 'гібрид' in text or 'гибрид' in text:
-                        fuel_type_raw = "гібрид"
-                        break
-
-        fuel_type = "gasoline"  # Default value
-        if fuel_type_raw:
-            fuel_text = fuel_type_raw.lower()
-            if 'дизель' in fuel_text or 'диз' in fuel_text:
-                fuel_type = "diesel"
-            elif 'електро' in fuel_text or 'электро' in fuel_text:
-                fuel_type = "electric"
-            elif 'гібрид' in fuel_text or 'гибрид' in fuel_text:
-                fuel_type = "hybrid"
-            elif 'газ' in fuel_text or 'метан' in fuel_text or 'пропан' in fuel_text:
-                fuel_type = "gas"
-            elif 'бензин' in fuel_text:
-                fuel_type = "gasoline"
-
-        # Print for debugging
-        print(f"Extracted fuel type: '{fuel_type_raw}' → '{fuel_type}'")
-
-        # Extract transmission
-        transmission_raw = extract_from_labels(soup, "коробка передач")
-        transmission = "manual"  # Default value
-        if transmission_raw:
-            if 'автомат' in transmission_raw.lower():
-                transmission = "automatic"
-            elif 'роботизована' in transmission_raw.lower() or 'типтроник' in transmission_raw.lower():
-                transmission = "semi-automatic"
-
-        # Extract body type
-        body_type_raw = extract_from_labels(soup, "Тип кузова")
-        body_type = "suv"  # Default since we're filtering for SUVs
-        if body_type_raw:
-            body_text = body_type_raw.lower()
-            if 'седан' in body_text:
-                body_type = "sedan"
-            elif 'універсал' in body_text:
-                body_type = "estate"
-            elif 'хетчбек' in body_text:
-                body_type = "hatchback"
-            elif 'купе' in body_text:
-                body_type = "coupe"
-            elif 'ліфтбек' in body_text:
-                body_type = "liftback"
-
-        # Extract condition
-        condition_tag = soup.find("span", class_="label", string=re.compile("Технічний стан", re.IGNORECASE))
-        condition = "used"  # Default value
-        if condition_tag:
-            condition_span = condition_tag.find_next("span", class_="argument")
-            condition_text = condition_span.get_text(strip=True).lower() if condition_span else ""
-            if 'нова' in condition_text:
-                condition = "new"
-            elif 'пошкодж' in condition_text:
-                condition = "damaged"
-
-        # Extract price
-        price = extract_price(soup)
-        if price <= 0:
-            print(f"Warning: Zero or negative price for {car_make} {model}, setting to 1000")
-            price = 1000.0
-
-        # Extract location        
-        location_tag = soup.select_one("div.item_region span.region")
-        location = location_tag.get_text(strip=True) if location_tag else "Unknown"
-        city, country = "Unknown", "Ukraine"  # Default values
-        if location:
-            location_parts = location.split(',')
-            city = location_parts[0].strip()
-            if len(location_parts) > 1:
-                country = location_parts[-1].strip()
-
-        # Extract engine details
-        engine_size = 0.0
-        engine_power = 0
-        
-        engine_info = extract_from_labels(soup, "Двигун")
-        if engine_info:
-            # Try to extract engine size (in liters)
-            size_match = re.search(r"(\d+(?:\.\d+)?)\s*л", engine_info)
-            if size_match:
-                try:
-                    engine_size = float(size_match.group(1))
-                except ValueError:
-                    pass
-            # Try to extract engine power (in hp)        
-            power_match = re.search(r"(\d+)\s*к\.с\.", engine_info)
-            if power_match:
-                try:
-                    engine_power = int(power_match.group(1))
-                except ValueError:
-                    pass
-
-        # Extract images
-        image_urls = extract_image_urls(soup)
-        
-        return {
-            "make": car_make,
-            "model": model,
-            "year": year,
-            "mileage": mileage,
-            "fuel_type": fuel_type,
-            "transmission": transmission,
-            "body_type": body_type,
-            "condition": condition,
-            "price": price,
-            "description": description,
-            "country": country,
-            "city": city,
-            "vehicle_type": "SUV",  # We're filtering for SUVs in the URL
-            "negotiable": True,
-            "engine_size": engine_size,
-            "engine_power": engine_power,
-            "image_urls": image_urls,
-            "original_url": url,
-            "is_imported": True
-        }
+    def location(self):
+        location_tag = self.soup.select_one("div.item_region span.region")
+        return location_tag.get_text(strip=True) if location_tag else None
+
+    def image_urls(self):
+        return extract_image_urls(self.soup)
+
+def listing_page(html, engine=None):
+    """Parse a listing page with LISTING_PARSER ('lxml' or 'bs4')"""
+    if (engine or settings.LISTING_PARSER) == 'bs4':
+        return SoupListingPage(html)
+    return ListingPage(html)
+
+def parse_car_html(html, url, engine=None):
+    """Parse car details from the HTML of an auto.ria.com listing"""
+    try:
+        return build_car_data(listing_page(html, engine), url)
     except Exception as e:
         print(f"Error parsing car details from {url}: {e}")
         import traceback
         traceback.print_exc()
         return None
 
+def build_car_data(page, url):
+    """Normalized car dict from a parsed listing page, or None without a title"""
+    # Title extraction with better error handling
+    title_text = page.title()
+    if title_text is None:
+        print(f"Error: Could not find title element on page {url}")
+        return None
+
+    # Extract year with better error handling
+    year_match = re.search(r"\b(19|20)\d{2}\b", title_text)
+    year = int(year_match.group(0)) if year_match else 2020
+    if not year_match:
+        print(f"Warning: Could not extract year from title '{title_text}', using default 2020")
+
+    # Extract make and model with better validation
+    title_parts = title_text.replace(str(year) if year_match else "", "").strip().split()
+    car_make = title_parts[0] if len(title_parts) >= 1 else "Unknown"
+    model = " ".join(title_parts[1:]) if len(title_parts) > 1 else "Unknown"
+    if car_make == "Unknown" or model == "Unknown":
+        print(f"Warning: Incomplete make/model extracted from '{title_text}'")
+
+    # Extract mileage
+    mileage_text = page.mileage_text()
+    mileage = 0
+    if mileage_text is not None:
+        mileage_text = mileage_text.replace("тис. км", "").strip()
+        try:
+            mileage = int(float(mileage_text.replace(",", ".")) * 1000)
+        except ValueError:
+            mileage = 0
+
+    description = page.description()
+
+    # Extract fuel type
+    fuel_type_raw = page.label("Двигун")
+    # Add a backup method to extract fuel type from other locations
+    if not fuel_type_raw:
+        # Try alternative labels
+        alt_labels = ["Паливо", "Тип палива", "Тип двигуна", "Топливо"]
+        for label in alt_labels:
+            fuel_type_raw = page.label(label)
+            if fuel_type_raw:
+                break
+        
+        # If still not found, try to find it in the page content
+        if not fuel_type_raw:
+            for text in page.characteristics_texts():
+                text = text.lower()
+                if 'бензин' in text:
+                    fuel_type_raw = "бензин"
+                    break
+                elif 'дизель' in text:
+                    fuel_type_raw = "дизель"
+                    break
+                elif 'газ' in text:
+                    fuel_type_raw = "газ"
+                    break
+                elif 'електро' in text or 'электро' in text:
+                    fuel_type_raw = "електро"
+                    break
+                elif 'гібрид' in text or 'гибрид' in text:
+                    fuel_type_raw = "гібрид"
+                    break
+
+    fuel_type = "gasoline"  # Default value
+    if fuel_type_raw:
+        fuel_text = fuel_type_raw.lower()
+        if 'дизель' in fuel_text or 'диз' in fuel_text:
+            fuel_type = "diesel"
+        elif 'електро' in fuel_text or 'электро' in fuel_text:
+            fuel_type = "electric"
+        elif 'гібрид' in fuel_text or 'гибрид' in fuel_text:
+            fuel_type = "hybrid"
+        elif 'газ' in fuel_text or 'метан' in fuel_text or 'пропан' in fuel_text:
+            fuel_type = "gas"
+        elif 'бензин' in fuel_text:
+            fuel_type = "gasoline"
+
+    # Print for debugging
+    print(f"Extracted fuel type: '{fuel_type_raw}' → '{fuel_type}'")
+
+    # Extract transmission
+    transmission_raw = page.label("коробка передач")
+    transmission = "manual"  # Default value
+    if transmission_raw:
+        if 'автомат' in transmission_raw.lower():
+            transmission = "automatic"
+        elif 'роботизована' in transmission_raw.lower() or 'типтроник' in transmission_raw.lower():
+            transmission = "semi-automatic"
+
+    # Extract body type
+    body_type_raw = page.label("Тип кузова")
+    body_type = "suv"  # Default since we're filtering for SUVs
+    if body_type_raw:
+        body_text = body_type_raw.lower()
+        if 'седан' in body_text:
+            body_type = "sedan"
+        elif 'універсал' in body_text:
+            body_type = "estate"
+        elif 'хетчбек' in body_text:
+            body_type = "hatchback"
+        elif 'купе' in body_text:
+            body_type = "coupe"
+        elif 'ліфтбек' in body_text:
+            body_type = "liftback"
+
+    # Extract condition
+    condition_text = page.condition_text()
+    condition = "used"  # Default value
+    if condition_text is not None:
+        condition_text = condition_text.lower()
+        if 'нова' in condition_text:
+            condition = "new"
+        elif 'пошкодж' in condition_text:
+            condition = "damaged"
+
+    # Extract price
+    price = page.price()
+    if price <= 0:
+        print(f"Warning: Zero or negative price for {car_make} {model}, setting to 1000")
+        price = 1000.0
+
+    # Extract location        
+    location = page.location()
+    if location is None:
+        location = "Unknown"
+    city, country = "Unknown", "Ukraine"  # Default values
+    if location:
+        location_parts = location.split(',')
+        city = location_parts[0].strip()
+        if len(location_parts) > 1:
+            country = location_parts[-1].strip()
+
+    # Extract engine details
+    engine_size = 0.0
+    engine_power = 0
+    
+    engine_info = page.label("Двигун")
+    if engine_info:
+        # Try to extract engine size (in liters)
+        size_match = re.search(r"(\d+(?:\.\d+)?)\s*л", engine_info)
+        if size_match:
+            try:
+                engine_size = float(size_match.group(1))
+            except ValueError:
+                pass
+        # Try to extract engine power (in hp)        
+        power_match = re.search(r"(\d+)\s*к\.с\.", engine_info)
+        if power_match:
+            try:
+                engine_power = int(power_match.group(1))
+            except ValueError:
+                pass
+
+    # Extract images
+    image_urls = page.image_urls()
+    
+    return {
+        "make": car_make,
+        "model": model,
+        "year": year,
+        "mileage": mileage,
+        "fuel_type": fuel_type,
+        "transmission": transmission,
+        "body_type": body_type,
+        "condition": condition,
+        "price": price,
+        "description": description,
+        "country": country,
+        "city": city,
+        "vehicle_type": "SUV",  # We're filtering for SUVs in the URL
+        "negotiable": True,
+        "engine_size": engine_size,
+        "engine_power": engine_power,
+        "image_urls": image_urls,
+        "original_url": url,
+        "is_imported": True
+    }
+
 def download_image(url):
-    """Download image from URL and create a ContentFile"""
+    """Download one image to a content-named temporary file, or None on failure"""
+    with ImageDownloader(workers=1, headers=headers) as downloader:
+        return downloader.try_fetch(url)
+
+def scrape_cars(limit=100, progress=None, journal=None, **fetcher_options):
+    """
+    Discover and parse up to `limit` listings concurrently.
+
+    Returns the parsed car dicts; `progress` is called with running counters
+    (pages_fetched, links_found, cars_parsed, errors, parse_stalls) and
+    finally with http_requests, http_retries and page_bytes_saved, what the
+    HTTP cache saved downloading. With a `journal` (cars.journal.RunJournal)
+    the scrape resumes the journaled run, skipping listings it already
+    parsed, and every car it parses is journaled.
+    """
+    resume = {}
+    if journal:
+        resume = {
+            "start_page": journal.start_page(),
+            "pending": journal.pending_urls(),
+            "seen": journal.known_urls(),
+        }
+        if resume["start_page"] is None:
+            print(f"Resuming with discovery done and {len(resume['pending'])} listings pending")
+        elif resume["start_page"] > 1 or resume["seen"]:
+            print(f"Resuming from search page {resume['start_page']} with {len(resume['pending'])} listings pending")
+
+    async def run(executor):
+        async with AsyncFetcher(user_agents=USER_AGENTS, **fetcher_options) as fetcher:
+            scraper = ListingScraper(
+                fetcher, search_url(), extract_listing_links, parse_car_html, progress=progress,
+                executor=executor, parse_workers=settings.SCRAPER_PARSE_WORKERS, journal=journal,
+            )
+            cars = await scraper.run(limit, **resume)
+            print(f"🏁 Scraped {len(cars)} cars: {scraper.stats}, http: {fetcher.stats}")
+            if progress:
+                progress({
+                    "http_requests": fetcher.stats["requests"],
+                    "http_retries": fetcher.stats["retries"],
+                    "page_bytes_saved": fetcher.stats["bytes_saved"],
+                })
+            return cars
+
+    # Listing pages are parsed in other processes, off the event loop
+    executor = parse_pool()
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Get file extension from URL
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-        ext = os.path.splitext(path)[1].lower()
-        if not ext or ext not in ['.jpg', '.jpeg', '.png', '.webp']:
-            ext = '.jpg'  # Default to .jpg if no extension is found
-        
-        # Create a unique filename
-        from django.utils import timezone
-        filename = f"{timezone.now().strftime('%Y%m%d%H%M%S')}{ext}"
-        
-        # Create a ContentFile with the image data
-        content_file = ContentFile(response.content, name=filename)
-        return content_file
+        return asyncio.run(run(executor))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if journal:
+            journal.flush()
+
+def get_import_user(admin_user_id):
+    """Seller for imported cars: the given user, else any superuser, else a new one"""
+    try:
+        admin_user = User.objects.get(id=admin_user_id)
+        print(f"Using admin user: {admin_user.username} (ID: {admin_user.id})")
+    except User.DoesNotExist:
+        print(f"Admin user with ID {admin_user_id} not found, creating default admin")
+        admin_user = User.objects.filter(is_superuser=True).first()
+
+        if not admin_user:
+            admin_user = User.objects.create_superuser(
+                'admin', 'admin@example.com', 'admin123'
+            )
+        print(f"Created or found admin user with ID: {admin_user.id}")
+    return admin_user
+
+def import_cars_sync(limit=100, admin_user_id=1, incremental=False, progress=None, run=None, job=None):
+    """
+    Import cars from auto.ria.com and save to the PostgreSQL database.
+
+    `progress` is called with running counters as the import advances
+    (pages_fetched, links_found, cars_parsed, errors, parse_stalls,
+    cars_saved, images_stored, page_bytes_saved, image_bytes_saved), possibly from inside the scraper's event loop.
+
+    The import is journaled as an ImportRun (see cars.journal). Passing an
+    unfinished `run` resumes it with its own limit and mode; an ImportJob's
+    import resumes the run the job's previous attempt left behind.
+    """
+    if run is None:
+        run = run_journal.run_for_job(job) if job else run_journal.start_run(limit, incremental)
+    journal = run_journal.RunJournal(run)
+    journal.start()
+    error = ''
+    try:
+        if run.incremental:
+            return import_cars_incremental(limit=run.limit, admin_user_id=admin_user_id, progress=progress, journal=journal)
+        return import_cars_full(limit=run.limit, admin_user_id=admin_user_id, progress=progress, journal=journal)
     except Exception as e:
-        print(f"Error downloading image from {url}: {e}")
-        return None
+        error = str(e)
+        raise
+    finally:
+        try:
+            journal.stop()
+        finally:
+            # A journal that could not be saved leaves the run interrupted
+            run_journal.finish(run, error)
 
-@transaction.atomic
-def import_cars_sync(limit=100, admin_user_id=1):
-    """Import cars from auto.ria.com and save to the PostgreSQL database"""
+
+def import_cars_full(limit=100, admin_user_id=1, progress=None, journal=None):
+    """
+    Replace every car with a fresh scrape of auto.ria.com.
+
+    The scrape runs outside any transaction, so the site keeps serving the
+    previous cars until the delete and the inserts commit together. A run
+    that already stored its cars (one whose failed listings were retried)
+    adds the newly parsed ones instead of replacing everything again.
+    """
     try:
         print(f"Starting import_cars_sync with limit={limit}, admin_user_id={admin_user_id}")
         
-        # Check if admin user exists
-        try:
-            admin_user = User.objects.get(id=admin_user_id)
-            print(f"Using admin user: {admin_user.username} (ID: {admin_user.id})")
-        except User.DoesNotExist:
-            print(f"Admin user with ID {admin_user_id} not found, creating default admin")
-            admin_user = User.objects.filter(is_superuser=True).first()
-            
-            if not admin_user:
-                admin_user = User.objects.create_superuser(
-                    'admin', 'admin@example.com', 'admin123'
-                )
-            admin_user_id = admin_user.id
-            print(f"Created or found admin user with ID: {admin_user_id}")
+        admin_user = get_import_user(admin_user_id)
         
         # # Check if we already have cars
         # existing_count = Car.objects.count()
@@ -459,60 +608,213 @@ def import_cars_sync(limit=100, admin_user_id=1):
         #         print("Already have enough cars, skipping import")
         #         return 0
         #     print(f"Will import up to {limit} more cars")
-        print('Delete all cars')
-        Car.objects.all().delete()  # Delete all cars for testing purposes
-        print('All cars deleted')
-        # Get the car links
-        links = get_suv_links(limit=limit)
+        # Fetch and parse the listings concurrently
+        cars_data = scrape_cars(limit=limit, progress=progress, journal=journal)
+        replace = True
+        if journal:
+            # Cars parsed before an interruption come from the journal
+            cars_data = journal.parsed_cars()
+            replace = not journal.any_stored()
         imported_count = 0
         
-        # Process each car
-        for link in links:
-            car_data = parse_car_details(link)
-            if not car_data:
-                continue
-                
-            # # Check if car with same make, model and year already exists
-            # existing_car = Car.objects.filter(
-            #     make=car_data["make"],
-            #     model=car_data["model"],
-            #     year=car_data["year"],
-            #     mileage=car_data["mileage"]
-            # ).first()
-            
-            # if existing_car:
-            #     print(f"[SKIP] Car already exists: {car_data['make']} {car_data['model']} ({car_data['year']})")
-            #     continue
-            
-            # Extract image URLs
-            image_urls = car_data.pop("image_urls", [])
-            
-            # Create car
-            car = Car.objects.create(
-                seller=admin_user,
-                **car_data
+        # Photos are fetched in parallel and streamed to temporary files; each
+        # download is moved into storage once, so it is popped when used
+        with ImageDownloader(headers=headers) as downloader:
+            downloads = downloader.download_all(
+                url for car_data in cars_data for url in car_data["image_urls"]
             )
-            
-            # Process images
-            for i, img_url in enumerate(image_urls):
-                try:
-                    # Download and create image
-                    img_content = download_image(img_url)
-                    if img_content:
-                        CarImage.objects.create(
-                            car=car,
-                            image=img_content,
-                            is_primary=(i == 0)  # First image is primary
-                        )
-                except Exception as e:
-                    print(f"Error processing image {img_url}: {e}")
-            
-            imported_count += 1
-            print(f"[✓] Imported: {car_data['make']} {car_data['model']} ({car_data['year']}) | ${car_data['price']}")
+        print(f"Image downloads: {downloader.stats}")
+        if progress:
+            progress({"image_bytes_saved": downloader.stats["bytes_saved"]})
+        
+        try:
+            with transaction.atomic():
+                if replace:
+                    print('Delete all cars')
+                    Car.objects.all().delete()
+                    print('All cars deleted')
+                # Rows are buffered and written in batches (COPY on PostgreSQL)
+                with BulkCarWriter(initial_load=replace, progress=progress) as writer:
+                    for car_data in cars_data:
+                        # Extract image URLs
+                        image_urls = car_data.pop("image_urls", [])
+
+                        # The first downloaded image becomes primary
+                        images = [(downloads.pop(url), url) for url in image_urls if downloads.get(url)]
+
+                        writer.create(Car(seller=admin_user, **car_data), images)
+                        imported_count += 1
+                        print(f"[✓] Imported: {car_data['make']} {car_data['model']} ({car_data['year']}) | ${car_data['price']}")
+                if journal:
+                    journal.stored(car_data["original_url"] for car_data in cars_data)
+        finally:
+            discard_unused(downloads)
+        print(f"Bulk writer: {writer.report()}")
         
         return imported_count
     except Exception as e:
         print(f"Error during import: {e}")
         import traceback
         traceback.print_exc()
-        return 0
\ No newline at end of file
+        # run_job and the run's journal record the failure
+        raise
+
+
+# Parsed fields that are compared against the stored car on re-import
+SYNCED_FIELDS = [
+    "make", "model", "year", "mileage", "fuel_type", "transmission", "body_type",
+    "condition", "price", "description", "country", "city", "vehicle_type",
+    "negotiable", "engine_size", "engine_power",
+]
+
+def changed_fields(car, car_data):
+    """Names of SYNCED_FIELDS whose parsed value differs from the stored one"""
+    changed = []
+    for name in SYNCED_FIELDS:
+        field = Car._meta.get_field(name)
+        value = field.to_python(car_data[name])
+        if isinstance(field, models.DecimalField):
+            value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+        if getattr(car, name) != value:
+            changed.append(name)
+    return changed
+
+def sync_car_images(car, image_urls, downloads, writer):
+    """Make the imported images of `car` match `image_urls`, keeping unchanged ones"""
+    existing = {image.source_url: image for image in car.images.all() if image.source_url}
+    for url, image in existing.items():
+        if url not in image_urls:
+            image.delete()
+    new_images = [(downloads.pop(url), url) for url in image_urls if url not in existing and downloads.get(url)]
+
+    # The first listing photo still present is the primary one
+    available = set(existing) | {url for _, url in new_images}
+    primary_url = next((url for url in image_urls if url in available), None)
+    for url, image in existing.items():
+        if url in image_urls and image.is_primary != (url == primary_url):
+            image.is_primary = url == primary_url
+            image.save(update_fields=["is_primary"])
+    writer.add_images(car, new_images, primary_url=primary_url)
+
+# Incremental imports running side by side (run_import_worker --concurrency)
+# write one batch at a time, so two jobs never insert the same listing
+import_write_lock = threading.Lock()
+
+def existing_cars(batch):
+    """Imported cars of a batch of parsed listings, by original_url"""
+    return {
+        car.original_url: car
+        for car in Car.objects.filter(
+            is_imported=True, original_url__in=[car_data["original_url"] for car_data in batch],
+        ).prefetch_related("images")
+    }
+
+def import_cars_incremental(limit=100, admin_user_id=1, batch_size=50, progress=None, journal=None):
+    """
+    Upsert scraped listings keyed on original_url.
+
+    New listings are created, changed ones updated field by field, unchanged
+    ones left alone, and only image URLs that were not imported before are
+    downloaded. Imported cars missing from the scrape are marked inactive
+    rather than deleted. Writes are committed in short per-batch transactions,
+    so the site keeps serving the previous data while the import runs. With a
+    `journal`, each batch is marked stored in its own transaction, so a
+    resumed run only writes what the interrupted one did not.
+    """
+    print(f"Starting incremental import with limit={limit}, admin_user_id={admin_user_id}")
+    admin_user = get_import_user(admin_user_id)
+
+    scrape_stats = {}
+
+    def scrape_progress(counters):
+        scrape_stats.update(counters)
+        if progress:
+            progress(counters)
+
+    cars_data = scrape_cars(limit=limit, progress=scrape_progress, journal=journal)
+    if journal:
+        # Cars parsed before an interruption come from the journal
+        cars_data = journal.parsed_cars()
+    stats = {"created": 0, "updated": 0, "unchanged": 0, "deactivated": 0, "images_downloaded": 0}
+
+    writer = BulkCarWriter(batch_size=batch_size, progress=progress)
+    with ImageDownloader(headers=headers) as downloader:
+        for start in range(0, len(cars_data), batch_size):
+            batch = cars_data[start:start + batch_size]
+            existing = existing_cars(batch)
+
+            # Download new photos before opening the transaction
+            needed = []
+            for car_data in batch:
+                car = existing.get(car_data["original_url"])
+                known = {image.source_url for image in car.images.all()} if car else set()
+                needed.extend(url for url in car_data["image_urls"] if url not in known)
+            downloads = downloader.download_all(needed)
+            stats["images_downloaded"] += sum(image is not None for image in downloads.values())
+
+            try:
+                with import_write_lock, transaction.atomic():
+                    # Another import may have created some of these meanwhile
+                    existing = existing_cars(batch)
+                    for car_data in batch:
+                        car_data = dict(car_data)
+                        image_urls = car_data.pop("image_urls", [])
+                        car = existing.get(car_data["original_url"])
+                        if car is None:
+                            images = [(downloads.pop(url), url) for url in image_urls if downloads.get(url)]
+                            writer.create(Car(seller=admin_user, **car_data), images)
+                            stats["created"] += 1
+                            print(f"[+] Created: {car_data['make']} {car_data['model']} ({car_data['year']})")
+                            continue
+
+                        changed = changed_fields(car, car_data)
+                        for name in changed:
+                            setattr(car, name, car_data[name])
+                        if not car.is_active:
+                            car.is_active = True
+                            changed.append("is_active")
+                        if changed:
+                            writer.update(car, changed)
+                            stats["updated"] += 1
+                            print(f"[~] Updated {', '.join(changed)}: {car.make} {car.model} ({car.year})")
+                        else:
+                            stats["unchanged"] += 1
+                        sync_car_images(car, image_urls, downloads, writer)
+                    writer.flush()
+                    if journal:
+                        journal.stored(car_data["original_url"] for car_data in batch)
+            finally:
+                discard_unused(downloads)
+    print(f"Image downloads: {downloader.stats}")
+    if progress:
+        progress({"image_bytes_saved": downloader.stats["bytes_saved"]})
+    writer.close()
+    print(f"Bulk writer: {writer.report()}")
+
+    # Only a scrape that walked every search page without errors proves a
+    # listing is gone; a partial one would hide cars that are still online
+    if journal:
+        complete = journal.complete()
+        seen = journal.seen_urls()
+    else:
+        complete = scrape_stats.get("links_found", 0) < limit and not scrape_stats.get("errors")
+        seen = {car_data["original_url"] for car_data in cars_data}
+    if seen and complete:
+        vanished = [
+            pk for pk, url in Car.objects.filter(is_imported=True, is_active=True).values_list("pk", "original_url")
+            if url not in seen
+        ]
+        for start in range(0, len(vanished), batch_size):
+            pks = vanished[start:start + batch_size]
+            Car.objects.filter(pk__in=pks).update(is_active=False, updated_at=timezone.now())
+            for pk in pks:
+                invalidate_car(pk)
+        stats["deactivated"] = len(vanished)
+    elif seen:
+        print("Scrape was partial, leaving listings that were not seen active")
+    # Queryset updates bypass the signals that keep these in sync
+    fuzzy.invalidate()
+    autocomplete.invalidate()
+
+    print(f"🏁 Incremental import finished: {stats}")
+    return stats["created"] + stats["updated"] + stats["unchanged"]
@@ -0,0 +1,328 @@
+"""
+Asynchronous fetch engine for the auto.ria.com import.
+
+Search pages and listing pages are fetched through one bounded aiohttp
+connection pool. A per-host token bucket enforces the politeness budget and
+429/5xx responses are retried with jittered exponential backoff. Link
+discovery feeds a queue that a set of listing workers drain concurrently, so
+an import is limited by the request rate we allow ourselves rather than by
+one round trip after another. Responses go through cars.httpcache, so an
+unchanged listing costs a 304 instead of a download.
+
+Parsing is CPU-bound and would hold the GIL against the event loop, so
+fetched pages go through a bounded queue to a process pool
+(SCRAPER_PARSE_WORKERS) and only the parsed car dicts come back. When
+parsing falls behind, the full queue stalls the fetch workers, which stalls
+link discovery: at most SCRAPER_PARSE_BACKLOG pages wait for a parser.
+
+With a `journal` (cars.journal.RunJournal) every search page and listing
+URL is reported as it advances, and run() can pick up where an interrupted
+run stopped.
+"""
+import asyncio
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+import aiohttp
+import django
+from django.conf import settings
+
+from . import httpcache
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A URL could not be fetched after all retries"""
+
+
+def backoff_delay(attempt, backoff, retry_after=''):
+    """Retry-After when the server sends one, otherwise full-jitter backoff"""
+    if retry_after.isdigit():
+        return float(retry_after)
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """aiohttp session with a bounded pool, per-host rate limiting and retries"""
+
+    def __init__(self, concurrency=None, rate=None, burst=None, max_retries=None,
+                 backoff=None, timeout=None, user_agents=None, cache=None):
+        self.concurrency = concurrency or settings.SCRAPER_CONCURRENCY
+        self.rate = rate or settings.SCRAPER_RATE
+        self.burst = burst or settings.SCRAPER_BURST
+        self.max_retries = settings.SCRAPER_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff or settings.SCRAPER_BACKOFF
+        self.timeout = timeout or settings.SCRAPER_TIMEOUT
+        self.user_agents = user_agents or [None]
+        self.cache = httpcache.get_cache() if cache is None else cache
+        self.buckets = {}
+        self.session = None
+        self.stats = {
+            'requests': 0, 'retries': 0, 'failures': 0, 'bytes': 0,
+            'cache_hits': 0, 'cache_revalidated': 0, 'bytes_saved': 0,
+        }
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def bucket_for(self, url):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    def retry_delay(self, attempt, response=None):
+        return backoff_delay(attempt, self.backoff, response.headers.get('Retry-After', '') if response is not None else '')
+
+    async def fetch(self, url, binary=False, ttl=None):
+        """
+        Body of `url` (str, or bytes when `binary`), or None for a 4xx other
+        than 429. A cached copy without validators is used while younger than
+        `ttl` (default SCRAPER_CACHE_TTL); one with validators is revalidated.
+        """
+        entry = None
+        if self.cache:
+            entry = await asyncio.to_thread(self.cache.lookup, url)
+            if entry is not None and entry.fresh(self.cache.ttl if ttl is None else ttl):
+                return await self.from_cache(entry, 'cache_hits', binary)
+
+        bucket = self.bucket_for(url)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            self.stats['requests'] += 1
+            headers = entry.validators() if entry is not None else {}
+            user_agent = random.choice(self.user_agents)
+            if user_agent:
+                headers['User-Agent'] = user_agent
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 304 and entry is not None:
+                        entry = await asyncio.to_thread(self.cache.revalidated, entry, response.headers) or entry
+                        return await self.from_cache(entry, 'cache_revalidated', binary)
+                    if response.status in RETRY_STATUSES:
+                        delay = self.retry_delay(attempt, response)
+                    elif response.status >= 400:
+                        self.stats['failures'] += 1
+                        return None
+                    else:
+                        body = await response.read()
+                        self.stats['bytes'] += len(body)
+                        if binary:
+                            charset = None
+                        else:
+                            charset = response.get_encoding()
+                        if self.cache:
+                            await asyncio.to_thread(self.cache.store, url, body, response.headers, charset)
+                        if binary:
+                            return body
+                        return body.decode(charset, errors='replace')
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                delay = self.retry_delay(attempt)
+
+            if attempt < self.max_retries:
+                self.stats['retries'] += 1
+                await asyncio.sleep(delay)
+
+        self.stats['failures'] += 1
+        raise FetchError(f"Giving up on {url} after {self.max_retries + 1} attempts")
+
+    async def from_cache(self, entry, counter, binary):
+        body = await asyncio.to_thread(entry.read)
+        self.stats[counter] += 1
+        self.stats['bytes_saved'] += len(body)
+        return body if binary else body.decode(entry.charset, errors='replace')
+
+
+def parse_pool(workers=None, initializer=django.setup):
+    """
+    Process pool for ListingScraper's parse stage, or None for threads.
+
+    Workers are spawned rather than forked so they share no database
+    connections with the parent, and set Django up before the first page.
+    """
+    workers = settings.SCRAPER_PARSE_WORKERS if workers is None else workers
+    if workers < 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=initializer,
+    )
+
+
+class ListingScraper:
+    """
+    Pipelined link discovery, listing fetches and listing parsing.
+
+    `extract_links(html)` returns the listing URLs of a search page and
+    `parse_listing(html, url)` the normalized car dict (or None); both are the
+    pure parsing helpers from parser_integration. `parse_listing` runs on
+    `executor` (see parse_pool), so with a process pool it must be picklable;
+    without one it runs on the loop's default thread pool.
+    """
+
+    def __init__(self, fetcher, search_url, extract_links, parse_listing, workers=None, progress=None,
+                 executor=None, parse_workers=None, parse_backlog=None, journal=None):
+        self.fetcher = fetcher
+        self.search_url = search_url
+        self.extract_links = extract_links
+        self.parse_listing = parse_listing
+        self.workers = workers or fetcher.concurrency
+        self.progress = progress
+        self.executor = executor
+        # One page per pool process in flight; the rest wait in the backlog
+        self.parse_workers = parse_workers or self.workers
+        self.parse_backlog = parse_backlog or settings.SCRAPER_PARSE_BACKLOG
+        self.journal = journal
+        self.stats = {'pages_fetched': 0, 'links_found': 0, 'cars_parsed': 0, 'errors': 0, 'parse_stalls': 0}
+
+    def report(self):
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    def page_url(self, page):
+        return self.search_url.replace('page=1', f'page={page}')
+
+    async def discover(self, queue, limit, start_page, pending, seen):
+        """
+        Enqueue `pending`, then walk search pages from `start_page` (None
+        skips the walk) and enqueue new listing URLs until `seen` holds `limit`
+        """
+        seen = set(seen)
+        page = start_page
+        try:
+            for link in pending:
+                self.stats['links_found'] += 1
+                await queue.put(link)
+            while page is not None and len(seen) < limit:
+                try:
+                    html = await self.fetcher.fetch(self.page_url(page), ttl=settings.SCRAPER_CACHE_SEARCH_TTL)
+                except FetchError as e:
+                    print(f"❌ Search page {page} failed: {e}")
+                    self.stats['errors'] += 1
+                    break
+                self.stats['pages_fetched'] += 1
+                new_links = [link for link in self.extract_links(html or '') if link not in seen]
+                if not new_links:
+                    print(f"No new links on page {page}, stopping discovery")
+                    if self.journal:
+                        self.journal.discovery_complete()
+                    break
+                new_links = new_links[:limit - len(seen)]
+                if self.journal:
+                    self.journal.discovered(page, new_links)
+                for link in new_links:
+                    seen.add(link)
+                    self.stats['links_found'] += 1
+                    await queue.put(link)
+                self.report()
+                page += 1
+        finally:
+            for _ in range(self.workers):
+                await queue.put(None)
+
+    async def parse(self, html, url):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.parse_listing, html, url)
+
+    async def fetch_pages(self, links, pages):
+        """Fetch worker: listing URL from `links` -> (html, url) on `pages`"""
+        while True:
+            url = await links.get()
+            if url is None:
+                return
+            error = 'Empty or client error response'
+            try:
+                html = await self.fetcher.fetch(url)
+            except FetchError as e:
+                print(f"❌ {e}")
+                html = None
+                error = str(e)
+            if not html:
+                self.stats['errors'] += 1
+                if self.journal:
+                    self.journal.failed(url, error)
+                self.report()
+                continue
+            if self.journal:
+                self.journal.fetched(url)
+            if pages.full():
+                # Backpressure: parsing is the bottleneck right now
+                self.stats['parse_stalls'] += 1
+            await pages.put((html, url))
+
+    async def fetch_all(self, links, pages):
+        try:
+            await asyncio.gather(*(self.fetch_pages(links, pages) for _ in range(self.workers)))
+        finally:
+            for _ in range(self.parse_workers):
+                await pages.put(None)
+
+    async def parse_pages(self, pages, results):
+        """Parse worker: hands one page at a time to the executor"""
+        while True:
+            item = await pages.get()
+            if item is None:
+                return
+            html, url = item
+            car_data = await self.parse(html, url)
+            if car_data:
+                results.append(car_data)
+                self.stats['cars_parsed'] += 1
+                if self.journal:
+                    self.journal.parsed(url, car_data)
+            else:
+                self.stats['errors'] += 1
+                if self.journal:
+                    self.journal.failed(url, 'Listing could not be parsed')
+            self.report()
+
+    async def run(self, limit, start_page=1, pending=(), seen=()):
+        """
+        Parsed car dicts of up to `limit` listings. A resumed run passes the
+        URLs it still has to fetch as `pending`, every URL it knows as `seen`,
+        and the first search page it has not walked as `start_page`.
+        """
+        links = asyncio.Queue(maxsize=self.workers * 2)
+        pages = asyncio.Queue(maxsize=self.parse_backlog)
+        results = []
+        await asyncio.gather(
+            self.discover(links, limit, start_page, pending, seen),
+            self.fetch_all(links, pages),
+            *(self.parse_pages(pages, results) for _ in range(self.parse_workers)),
+        )
+        return results
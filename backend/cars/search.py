@@ -0,0 +1,53 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from rest_framework import filters
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_query(text):
+    """
+    tsquery matching either stemmed English words or, for Ukrainian and other
+    unstemmed text, every token as a prefix of the indexed 'simple' lexemes.
+    """
+    query = SearchQuery(text, search_type='websearch', config='english')
+    tokens = TOKEN_RE.findall(text.lower())
+    if tokens:
+        prefixes = ' & '.join(f"'{token}':*" for token in tokens)
+        query |= SearchQuery(prefixes, search_type='raw', config='simple')
+    return query
+
+
+class CarSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the trigger-maintained Car.search_vector on PostgreSQL.
+
+    Every queryset is annotated with `relevance` so clients can request
+    ?ordering=-relevance. On other databases (the SQLite dev setup) it falls
+    back to the icontains lookups of SearchFilter over view.search_fields, with
+    make/model matches ranked above description-only matches.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset.annotate(relevance=Value(0.0, output_field=FloatField()))
+
+        if connections[queryset.db].vendor == 'postgresql':
+            query = build_search_query(' '.join(terms))
+            return queryset.filter(search_vector=query).annotate(
+                relevance=SearchRank(F('search_vector'), query)
+            )
+
+        queryset = super().filter_queryset(request, queryset, view)
+        title_match = Q()
+        for term in terms:
+            title_match |= Q(make__icontains=term) | Q(model__icontains=term)
+        return queryset.annotate(relevance=Case(
+            When(title_match, then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        ))
@@ -1,14 +1,47 @@
 from rest_framework import serializers
 from django.conf import settings
-from .models import Car, CarImage
+from .models import Car, CarImage, ImportJob
 from django.utils import timezone
 
+def requested_fields(request, available):
+    """
+    Field names selected with ?fields= and/or ?omit= on read requests, or None
+    when the client wants the full representation
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit')
+    if not fields and not omit:
+        return None
+
+    selected = set(available)
+    if fields:
+        selected &= {name.strip() for name in fields.split(',')}
+    if omit:
+        selected -= {name.strip() for name in omit.split(',')}
+    return selected
+
+
+class SparseFieldsetMixin:
+    """Drop the serializer fields not selected by ?fields= / ?omit="""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = requested_fields(self.context.get('request'), self.fields.keys())
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+
 class CarImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = CarImage
-        fields = ['id', 'image', 'is_primary', 'uploaded_at']
+        fields = ['id', 'image', 'srcset', 'placeholder', 'is_primary', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at']
     
     def get_image(self, obj):
@@ -18,8 +51,26 @@ class CarImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_srcset(self, obj):
+        """
+        {'webp': 'url 320w, url 640w', 'jpg': ...} for <picture>/<img srcset>,
+        or {} until the derivatives have been rendered
+        """
+        request = self.context.get('request')
+        files = (obj.variants or {}).get('files')
+        if not request or not files:
+            return {}
+        storage = obj.image.storage
+        return {
+            ext: ', '.join(
+                f"{request.build_absolute_uri(storage.url(name))} {width}w"
+                for width, name in sorted(names.items(), key=lambda item: int(item[0]))
+            )
+            for ext, names in files.items()
+        }
+
 
-class CarSerializer(serializers.ModelSerializer):
+class CarSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = CarImageSerializer(many=True, read_only=True)
     image_files = serializers.ListField(
         child=serializers.ImageField(max_length=1000000, allow_empty_file=False, use_url=False),
@@ -82,4 +133,62 @@ class CarSerializer(serializers.ModelSerializer):
                     is_primary=(not has_images and i == 0)  # Primary only if first image and no existing images
                 )
                 
-        return instance
\ No newline at end of file
+        return instance
+
+
+class CarListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Summary representation used by list endpoints.
+
+    Expects the queryset built by CarViewSet for list actions: the seller is
+    select_related, `image_count` is annotated and only the primary image is
+    prefetched into `primary_images`, so a page costs a fixed number of
+    queries whatever its size. `images` carries just that primary image to
+    stay compatible with clients reading images[0].
+    """
+    seller = serializers.SerializerMethodField()
+    primary_image = serializers.SerializerMethodField()
+    image_count = serializers.IntegerField(read_only=True)
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Car
+        fields = [
+            'id', 'make', 'model', 'year', 'price', 'mileage', 'seller',
+            'created_at', 'primary_image', 'image_count', 'images', 'fuel_type',
+            'transmission', 'body_type', 'condition', 'city', 'vehicle_type',
+            'country', 'negotiable'
+        ]
+        read_only_fields = fields
+
+    def get_seller(self, obj):
+        return {
+            'id': obj.seller.id,
+            'username': obj.seller.username
+        }
+
+    def _primary(self, obj):
+        images = getattr(obj, 'primary_images', None)
+        return images[0] if images else None
+
+    def get_primary_image(self, obj):
+        image = self._primary(obj)
+        if image is None:
+            return None
+        return CarImageSerializer(image, context=self.context).data['image']
+
+    def get_images(self, obj):
+        image = self._primary(obj)
+        if image is None:
+            return []
+        return [CarImageSerializer(image, context=self.context).data]
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'status', 'limit', 'incremental', 'progress', 'imported_count',
+            'error', 'attempts', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from militex.conditional import track_deletions
+
+from . import autocomplete, derivatives, fuzzy
+from .cache import invalidate_car
+from .models import Car, CarImage
+from .storage import release
+
+track_deletions(Car)
+
+
+@receiver(post_init, sender=Car)
+def car_loaded(sender, instance, **kwargs):
+    # Remember the indexed values so a later save can move the car between entries
+    instance._autocomplete_values = autocomplete.indexed_values(instance)
+
+
+@receiver(post_save, sender=Car)
+def car_saved(sender, instance, created, **kwargs):
+    invalidate_car(instance.pk)
+
+    new_values = autocomplete.indexed_values(instance)
+    if created:
+        autocomplete.update_car(None, new_values)
+        fuzzy.update_car(None, new_values)
+    elif instance._autocomplete_values is not None and new_values is not None:
+        autocomplete.update_car(instance._autocomplete_values, new_values)
+        fuzzy.update_car(instance._autocomplete_values, new_values)
+    else:
+        # Loaded with deferred fields: the old make/model are unknown
+        fuzzy.invalidate()
+    instance._autocomplete_values = new_values
+
+
+@receiver(post_delete, sender=Car)
+def car_deleted(sender, instance, **kwargs):
+    invalidate_car(instance.pk)
+    if instance._autocomplete_values is not None:
+        fuzzy.update_car(instance._autocomplete_values, None)
+    else:
+        fuzzy.invalidate()
+    autocomplete.update_car(instance._autocomplete_values, None)
+
+
+@receiver(post_save, sender=CarImage)
+@receiver(post_delete, sender=CarImage)
+def car_image_changed(sender, instance, **kwargs):
+    # Covers add_images, delete_image and set_primary_image. Touching the car
+    # also moves the ETag/Last-Modified validators derived from updated_at.
+    origin = kwargs.get('origin')
+    if origin is not None and getattr(origin, 'model', type(origin)) is not CarImage:
+        # Deleted along with its car (or the car's owner); car_deleted covers it
+        return
+    Car.objects.filter(pk=instance.car_id).update(updated_at=timezone.now())
+    invalidate_car(instance.car_id, rows_changed=False)
+
+
+@receiver(post_delete, sender=CarImage)
+def car_image_deleted(sender, instance, using, **kwargs):
+    # Files are shared between identical photos; drop it with its last row
+    release(instance.image.name, using=using)
+
+
+@receiver(post_save, sender=CarImage)
+def car_image_created(sender, instance, created, using, **kwargs):
+    if created and instance.image and not instance.variants:
+        name = instance.image.name
+        transaction.on_commit(lambda: derivatives.schedule([name]), using=using)
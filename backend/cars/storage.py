@@ -0,0 +1,141 @@
+"""
+Content-addressed storage for car photos.
+
+A photo is stored under the sha256 of its bytes
+(car_images/ab/abcdef....jpg), so the same auto.ria photo imported twice or
+an upload re-sent on retry is written once and shared by every CarImage that
+points at it. Files never change under a name, which makes them safe to
+serve with immutable cache headers.
+
+The CarImage rows are the reference counts: a file and its resized
+derivatives are removed only once no row references its name any more (see
+release()). A row that references a file may not be committed yet, for
+example an import storing the photo a user is deleting. So storing a name
+that exists refreshes the file's mtime, and release() leaves alone files
+touched within RELEASE_GRACE seconds. `dedupe_car_images --delete-orphans`
+sweeps those files up later.
+"""
+import hashlib
+import os
+import shutil
+import time
+import uuid
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+# Files stored or reused this recently may back a row that is not committed yet
+RELEASE_GRACE = 3600
+
+
+def content_digest(content):
+    """sha256 hex digest of a File, reusing one computed during download"""
+    digest = getattr(content, 'digest', None)
+    if digest:
+        return digest
+    sha = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        sha.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return sha.hexdigest()
+
+
+def content_name(directory, digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()
+    if ext == '.jpeg':
+        ext = '.jpg'
+    return os.path.join(directory, digest[:2], f'{digest}{ext}')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content and skips writing duplicates"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        # upload_to has already put the file in its directory
+        name = content_name(os.path.dirname(name), content_digest(content), name)
+        return super().save(name, content, max_length=max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # Equal names mean equal bytes, so an existing file is reused as is
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        try:
+            # A fresh mtime keeps release() and the orphan sweep off this file
+            os.utime(full_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if hasattr(content, 'temporary_file_path') and os.path.exists(content.temporary_file_path()):
+                # Storing a temporary file consumes it, whether or not it was new
+                os.remove(content.temporary_file_path())
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+
+        # Write beside the target and rename into place: concurrent saves of
+        # the same bytes race harmlessly and readers never see partial files
+        partial_path = f'{full_path}.{uuid.uuid4().hex}.part'
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                file_move_safe(content.temporary_file_path(), partial_path)
+            else:
+                with open(partial_path, 'wb') as out:
+                    for chunk in content.chunks():
+                        out.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(partial_path, self.file_permissions_mode)
+            os.replace(partial_path, full_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        return name
+
+
+car_image_storage = ContentAddressedStorage()
+
+
+def release(name, using='default'):
+    """
+    Delete the file `name` once the current transaction commits, unless a
+    CarImage still references it or it was stored within RELEASE_GRACE.
+    """
+    from .derivatives import variant_dir
+    from .models import CarImage
+
+    def delete_if_unreferenced():
+        if not name or CarImage.objects.using(using).filter(image=name).exists():
+            return
+        path = car_image_storage.path(name)
+        # Move the file aside first: a save that reuses it from now on finds
+        # nothing to touch and writes it again
+        doomed = f'{path}.{uuid.uuid4().hex}.deleting'
+        try:
+            os.rename(path, doomed)
+        except FileNotFoundError:
+            return
+        if time.time() - os.path.getmtime(doomed) < RELEASE_GRACE:
+            # Stored or reused since the row was deleted; put it back
+            os.replace(doomed, path)
+            return
+        os.remove(doomed)
+        shutil.rmtree(car_image_storage.path(variant_dir(name)), ignore_errors=True)
+
+    transaction.on_commit(delete_if_unreferenced, using=using)
@@ -2,15 +2,26 @@ from rest_framework import viewsets, filters, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
-import os
+from django.core.cache import cache
+from django.urls import reverse
 
 # Import DjangoFilterBackend from the correct package
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Car, CarImage
-from .serializers import CarSerializer
-from .parser_integration import import_cars_sync
+from militex.conditional import ConditionalGetMixin
+
+from .models import Car, CarImage, ImportJob
+from .serializers import CarSerializer, CarListSerializer, ImportJobSerializer, requested_fields
+from .pagination import CarCursorPagination
+from .search import CarSearchFilter
+from .fuzzy import resolve as resolve_fuzzy
+from . import autocomplete as autocomplete_index
+from . import cache as car_cache
+from .facets import compute_facets
+from . import jobs as import_jobs
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -22,18 +33,94 @@ class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-class CarViewSet(viewsets.ModelViewSet):
+# Always loaded under ?fields= because pagination cursors read them
+KEYSET_COLUMNS = {'id', 'created_at', 'price', 'year', 'mileage'}
+CAR_COLUMNS = {field.name for field in Car._meta.concrete_fields}
+
+
+def select_columns(queryset, fields):
+    """Push a sparse fieldset down into the SELECT list with .only()"""
+    if fields is None:
+        return queryset
+    columns = KEYSET_COLUMNS | {name for name in fields if name in CAR_COLUMNS and name != 'seller'}
+    if 'seller' in fields:
+        columns |= {'seller', 'seller__id', 'seller__username'}
+    return queryset.only(*columns)
+
+
+def with_list_summary(queryset, fields=None):
+    """
+    Load everything CarListSerializer needs in a fixed number of queries:
+    the seller via JOIN, the image count as a correlated subquery and the
+    primary (or newest) image of each car as a single prefetch. With a sparse
+    fieldset, only the columns, joins and prefetches it needs are kept.
+    """
+    wants = lambda name: fields is None or name in fields
+    queryset = select_columns(queryset, fields)
+    if wants('seller'):
+        queryset = queryset.select_related('seller')
+    if wants('image_count'):
+        car_images = CarImage.objects.filter(car=OuterRef('pk')).order_by()
+        queryset = queryset.annotate(image_count=Coalesce(
+            Subquery(car_images.values('car').annotate(count=Count('pk')).values('count')),
+            0,
+            output_field=IntegerField(),
+        ))
+    if wants('primary_image') or wants('images'):
+        primary_image = CarImage.objects.filter(
+            pk=Subquery(
+                CarImage.objects.filter(car=OuterRef('car'))
+                .order_by('-is_primary', '-uploaded_at')
+                .values('pk')[:1]
+            )
+        )
+        queryset = queryset.prefetch_related(Prefetch('images', queryset=primary_image, to_attr='primary_images'))
+    return queryset
+
+
+def with_details(queryset, fields=None):
+    """Relations CarSerializer needs, restricted to a sparse fieldset if any"""
+    wants = lambda name: fields is None or name in fields
+    queryset = select_columns(queryset, fields)
+    if wants('seller'):
+        queryset = queryset.select_related('seller')
+    if wants('images'):
+        queryset = queryset.prefetch_related('images')
+    return queryset
+
+
+class CarViewSet(ConditionalGetMixin, car_cache.CachedResponseMixin, viewsets.ModelViewSet):
     serializer_class = CarSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, CarSearchFilter, filters.OrderingFilter]
     filterset_fields = ['make', 'model', 'year', 'fuel_type', 'transmission', 
                        'body_type', 'condition', 'country', 'city', 'vehicle_type']
     search_fields = ['make', 'model', 'description']
-    ordering_fields = ['price', 'year', 'mileage', 'created_at']
+    ordering_fields = ['price', 'year', 'mileage', 'created_at', 'relevance']
     ordering = ['-created_at']
+    # Actions that return many cars and use the summary representation
+    list_actions = ['list', 'my_listings', 'fuzzy']
+    # Actions that hide cars a later import no longer found; their sellers
+    # still edit and delete them
+    public_actions = ['list', 'retrieve', 'facets', 'fuzzy']
     
+    def get_serializer_class(self):
+        if self.action in self.list_actions:
+            return CarListSerializer
+        return CarSerializer
+
+    def get_requested_fields(self):
+        return requested_fields(self.request, self.get_serializer_class().Meta.fields)
+
     def get_queryset(self):
-        queryset = Car.objects.all().prefetch_related('images')
+        fields = self.get_requested_fields()
+        cars = Car.objects.all()
+        if self.action in self.public_actions:
+            cars = cars.filter(is_active=True)
+        if self.action in self.list_actions:
+            queryset = with_list_summary(cars, fields)
+        else:
+            queryset = with_details(cars, fields)
         
         # Filter by price range
         min_price = self.request.query_params.get('min_price')
@@ -84,6 +171,18 @@ class CarViewSet(viewsets.ModelViewSet):
                 pass
         
         return queryset
+
+    @property
+    def paginator(self):
+        """
+        Keyset pagination is opt-in: clients switch to it with ?pagination=cursor
+        and keep following the opaque ?cursor= links it returns.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params or params.get('pagination') == 'cursor':
+                self._paginator = CarCursorPagination()
+        return super().paginator
     
     def get_permissions(self):
         """
@@ -96,7 +195,7 @@ class CarViewSet(viewsets.ModelViewSet):
         elif self.action in ['create', 'update', 'partial_update', 'destroy', 'my_listings', 
                            'add_images', 'delete_image', 'set_primary_image']:
             permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-        elif self.action == 'import_from_autoria':
+        elif self.action in ['import_from_autoria', 'import_job', 'cache_stats']:
             permission_classes = [IsAdminUser]
         else:
             permission_classes = [permissions.AllowAny]
@@ -109,7 +208,7 @@ class CarViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_listings(self, request):
         """Get the current user's car listings"""
-        queryset = Car.objects.filter(seller=request.user).prefetch_related('images')
+        queryset = with_list_summary(Car.objects.filter(seller=request.user), self.get_requested_fields())
         page = self.paginate_queryset(queryset)
 
         if page is not None:
@@ -119,15 +218,91 @@ class CarViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
         
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Per-value counts for the filter sidebar under the current filters"""
+        params = car_cache.normalize_params(request.query_params, ignore=car_cache.NON_FILTER_PARAMS)
+        key = car_cache.make_key('cars:facets', params)
+        facets = cache.get(key)
+        if facets is None:
+            facets = compute_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, facets, car_cache.facets_timeout())
+        return Response(facets)
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Hit/miss counters of the list/retrieve response cache"""
+        return Response(car_cache.get_stats())
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Make/model/city suggestions for ?q=, answered from the in-memory prefix
+        index; ?in=make,city limits them to some fields (?fields= selects the
+        fields of car representations)
+        """
+        query = request.query_params.get('q', '').strip()
+        fields = [field for field in request.query_params.get('in', '').split(',') if field in autocomplete_index.FIELDS]
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+
+        results = autocomplete_index.search(query, fields=fields or autocomplete_index.FIELDS, limit=limit)
+        return Response({'query': query, 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def fuzzy(self, request):
+        """
+        Typo-tolerant make/model lookup: returns the corrected canonical values
+        together with the matching cars (?make=Toyta&model=Rav4)
+        """
+        make = resolve_fuzzy('make', request.query_params.get('make', '').strip())
+        canonical_make = make['value'] if make else None
+        model = resolve_fuzzy('model', request.query_params.get('model', '').strip(), make=canonical_make)
+
+        if not make and not model:
+            return Response({'status': 'error', 'message': 'Provide make and/or model'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Range filters still apply; the exact make/model filters would not match typos
+        queryset = self.get_queryset()
+        if make:
+            queryset = queryset.filter(make=canonical_make)
+        if model:
+            queryset = queryset.filter(model=model['value'])
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response({'results': self.get_serializer(queryset, many=True).data})
+        response.data['make'] = make
+        response.data['model'] = model
+        return response
+
     @action(detail=False, methods=['post'])
     def import_from_autoria(self, request):
-        """Import cars from auto.ria.com"""
+        """Queue an import from auto.ria.com for `manage.py run_import_worker`"""
         try:
             limit = int(request.data.get('limit', 5))
-            count = import_cars_sync(limit=limit, admin_user_id=request.user.id)
-            return Response({'status': 'success', 'count': count}, status=status.HTTP_200_OK)
+            incremental = str(request.data.get('incremental', '')).lower() in ('1', 'true', 'yes')
+            job = import_jobs.enqueue(limit=limit, incremental=incremental, user=request.user)
+            return Response({
+                'status': 'queued',
+                'job_id': job.pk,
+                'status_url': request.build_absolute_uri(reverse('car-import-job', kwargs={'job_id': job.pk})),
+            }, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], url_path=r'import_jobs/(?P<job_id>[0-9]+)')
+    def import_job(self, request, job_id=None):
+        """Status and progress of a queued import"""
+        try:
+            job = ImportJob.objects.get(pk=job_id)
+        except ImportJob.DoesNotExist:
+            return Response({'status': 'error', 'message': 'Import job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ImportJobSerializer(job).data)
     
     @action(detail=True, methods=['post'])
     def add_images(self, request, pk=None):
@@ -176,10 +351,8 @@ class CarViewSet(viewsets.ModelViewSet):
             image = CarImage.objects.get(id=image_id, car=car)
             was_primary = image.is_primary
             
-            # Delete the image file
-            if image.image and os.path.exists(image.image.path):
-                os.remove(image.image.path)
-                
+            # The file may be shared with other images; it is removed
+            # together with the last CarImage that references it
             image.delete()
             
             # If the deleted image was primary, set a new primary image
@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
+from militex.conditional import track_deletions
+
 
 class Fundraiser(models.Model):
     title = models.CharField(_('Title'), max_length=200)
@@ -38,3 +40,6 @@ class Donation(models.Model):
         if self.donor:
             return f"{self.donor.username} donated {self.amount} to {self.fundraiser.title}"
         return f"Guest donated {self.amount} to {self.fundraiser.title}"
+
+
+track_deletions(Fundraiser)
@@ -2,6 +2,8 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db import transaction
+from django.db.models import Count, Max
+from militex.conditional import ConditionalGetMixin
 from .models import Fundraiser, Donation
 from .serializers import FundraiserSerializer, DonationSerializer
 
@@ -13,11 +15,18 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.created_by == request.user
 
 
-class FundraiserViewSet(viewsets.ModelViewSet):
+class FundraiserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Fundraiser.objects.all()
     serializer_class = FundraiserSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
+    def get_validator_aggregates(self):
+        # Donations are nested in the representation and can change on their own
+        aggregates = super().get_validator_aggregates()
+        aggregates['donation_count'] = Count('donations', distinct=True)
+        aggregates['last_donation_at'] = Max('donations__created_at')
+        return aggregates
+
     # This should NOT be an @action - remove the decorator
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
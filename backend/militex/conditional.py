@@ -0,0 +1,122 @@
+import calendar
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Bump when a serializer change alters the bytes of unchanged resources
+REPRESENTATION_VERSION = 1
+
+DELETED_AT_KEY = 'conditional:deleted_at:{label}'
+# Seconds cached validators live when the view does not say
+VALIDATORS_TIMEOUT = 600
+
+
+def record_deletion(sender, **kwargs):
+    """
+    Deleting a row cannot move Max(updated_at) forward, so remember when the
+    model last lost a row and fold that into list Last-Modified values.
+    """
+    cache.set(DELETED_AT_KEY.format(label=sender._meta.label_lower), time.time(), timeout=None)
+
+
+def track_deletions(*models):
+    """Connect record_deletion for the models a ConditionalGetMixin view serves"""
+    for model in models:
+        post_delete.connect(record_deletion, sender=model, dispatch_uid=f'conditional:{model._meta.label_lower}')
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag / Last-Modified validators for list and retrieve.
+
+    Validators come from a single aggregate query (row count and
+    Max(updated_at) over the filtered queryset) plus everything else the body
+    depends on (query string, host, negotiated format), so an If-None-Match or
+    If-Modified-Since hit is answered with 304 before anything is serialized.
+
+    A view that keeps generation-keyed caches can define
+    get_validators_cache_key(request, action) (and optionally
+    get_validators_cache_timeout()); the validators are then cached under
+    that key and the aggregate only runs when the generation has moved.
+    """
+    updated_field = 'updated_at'
+
+    def get_validator_aggregates(self):
+        return {
+            'last_modified': Max(self.updated_field),
+            'count': Count('pk', distinct=True),
+        }
+
+    def get_validators(self, request, action):
+        queryset = self.get_queryset()
+        if action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        else:
+            queryset = self.filter_queryset(queryset)
+        state = queryset.order_by().aggregate(**self.get_validator_aggregates())
+        if action == 'retrieve' and not state['count']:
+            return None, None
+
+        last_modified = state['last_modified']
+        timestamp = calendar.timegm(last_modified.utctimetuple()) if last_modified else 0
+        if action == 'list':
+            deleted_at = cache.get(DELETED_AT_KEY.format(label=queryset.model._meta.label_lower))
+            if deleted_at:
+                timestamp = max(timestamp, int(deleted_at))
+
+        fingerprint = json.dumps([
+            REPRESENTATION_VERSION,
+            queryset.model._meta.label_lower,
+            action,
+            {key: str(value) for key, value in state.items()},
+            request.get_host(),
+            request.scheme,
+            getattr(request, 'accepted_media_type', ''),
+            sorted(request.query_params.lists()),
+        ], separators=(',', ':'))
+        etag = quote_etag(hashlib.sha1(fingerprint.encode('utf-8')).hexdigest())
+        return etag, timestamp or None
+
+    def cached_validators(self, request, action):
+        key_for = getattr(self, 'get_validators_cache_key', None)
+        if key_for is None:
+            return self.get_validators(request, action)
+        key = key_for(request, action)
+        validators = cache.get(key)
+        if validators is None:
+            validators = self.get_validators(request, action)
+            if validators[0] is not None:
+                timeout_for = getattr(self, 'get_validators_cache_timeout', None)
+                cache.set(key, validators, timeout_for() if timeout_for else VALIDATORS_TIMEOUT)
+        return validators
+
+    def conditional_response(self, request, action, render):
+        if request.method not in ('GET', 'HEAD'):
+            return render()
+
+        etag, last_modified = self.cached_validators(request, action)
+        if etag is None:
+            return render()
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, 'list', lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, 'retrieve', lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
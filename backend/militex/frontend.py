@@ -0,0 +1,247 @@
+"""
+In-memory server for the React build (FRONTEND_BUILD_DIR).
+
+The build directory is indexed once per process, on first use: every file up
+to FRONTEND_ASSET_MAX_MEMORY_SIZE is kept in memory together with gzip and,
+when the brotli package is installed, brotli copies of the compressible ones
+(.gz/.br files shipped in the build are used as they are). Requests are then
+answered from the index alone: the encoding is negotiated from
+Accept-Encoding, each representation has its own strong ETag for 304s, and
+unknown paths get index.html for client-side routing.
+
+Hashed names (static/js/main.d415ab9c.js) are cached as immutable; a request
+for the same file under an older hash, without its hash or without its
+directory is resolved to the current build's file.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+# main.d415ab9c.js, main.0667c3ef.css.map: content hash before the extension(s)
+HASHED_NAME_RE = re.compile(r'^(?P<stem>[^.]+)\.[0-9a-f]{8,}\.(?P<ext>.+)$')
+# Preferred first when the client accepts both equally
+ENCODINGS = ('br', 'gzip')
+PRECOMPRESSED_SUFFIXES = {'.br': 'br', '.gz': 'gzip'}
+# Compressed copies are kept only when they save at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+CONTENT_TYPES = {
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.css': 'text/css',
+    '.map': 'application/json',
+    '.json': 'application/json',
+    '.webmanifest': 'application/manifest+json',
+    '.svg': 'image/svg+xml',
+    '.txt': 'text/plain',
+}
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/manifest+json',
+    'application/xml', 'image/svg+xml', 'image/x-icon',
+}
+
+
+def content_type_for(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext in CONTENT_TYPES:
+        return CONTENT_TYPES[ext]
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def is_compressible(content_type):
+    return content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES
+
+
+def unhashed_name(path):
+    """static/js/main.d415ab9c.js -> static/js/main.js, None if not hashed"""
+    directory, filename = os.path.split(path)
+    match = HASHED_NAME_RE.match(filename)
+    if not match:
+        return None
+    return os.path.join(directory, f"{match.group('stem')}.{match.group('ext')}")
+
+
+def accepted_encodings(header):
+    """Encodings of ENCODINGS the Accept-Encoding header allows, best first"""
+    quality = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            quality[coding] = q
+    wildcard = quality.get('*', 0.0)
+    ranked = [
+        (quality.get(coding, wildcard), -position, coding)
+        for position, coding in enumerate(ENCODINGS)
+    ]
+    return [coding for q, _, coding in sorted(ranked, reverse=True) if q > 0]
+
+
+class Asset:
+    def __init__(self, path, name, stat_result, body=None):
+        self.path = path
+        self.name = name
+        self.size = stat_result.st_size
+        self.last_modified = int(stat_result.st_mtime)
+        self.content_type = content_type_for(name)
+        self.body = body
+        self.encoded = {}
+        digest = hashlib.sha256(body).hexdigest()[:32] if body is not None else (
+            f'{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}'
+        )
+        self.etags = {None: f'"{digest}"'}
+        self.immutable = bool(HASHED_NAME_RE.match(os.path.basename(name)))
+
+    def add_encoding(self, coding, data):
+        if len(data) <= self.size * (1 - MIN_COMPRESSION_SAVING):
+            self.encoded[coding] = data
+            self.etags[coding] = f'{self.etags[None][:-1]}-{coding}"'
+
+
+class FrontendAssets:
+    """Index of one build directory; see the module docstring"""
+
+    def __init__(self, build_dir, max_memory_size=None):
+        self.build_dir = build_dir
+        self.max_memory_size = (
+            settings.FRONTEND_ASSET_MAX_MEMORY_SIZE if max_memory_size is None else max_memory_size
+        )
+        self.assets = {}
+        self.aliases = {}
+        self.memory_size = 0
+        self.build()
+
+    def build(self):
+        precompressed = []
+        for directory, _, files in os.walk(self.build_dir):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.build_dir).replace(os.sep, '/')
+                base, suffix = os.path.splitext(name)
+                if suffix in PRECOMPRESSED_SUFFIXES and os.path.exists(os.path.join(self.build_dir, base)):
+                    precompressed.append((base, PRECOMPRESSED_SUFFIXES[suffix], path))
+                    continue
+                self.assets[name] = self.load(path, name)
+
+        for base, coding, path in precompressed:
+            asset = self.assets.get(base)
+            if asset is not None and asset.body is not None and os.path.getsize(path) <= self.max_memory_size:
+                with open(path, 'rb') as f:
+                    asset.add_encoding(coding, f.read())
+        for asset in self.assets.values():
+            if asset.body is not None and is_compressible(asset.content_type):
+                if 'gzip' not in asset.encoded:
+                    asset.add_encoding('gzip', gzip.compress(asset.body, 9, mtime=0))
+                if 'br' not in asset.encoded and brotli is not None:
+                    asset.add_encoding('br', brotli.compress(asset.body))
+            self.memory_size += (len(asset.body) if asset.body is not None else 0) + sum(
+                len(data) for data in asset.encoded.values()
+            )
+
+        # Lookups the old servers resolved by probing the disk on each request
+        for name in sorted(self.assets):
+            logical = unhashed_name(name)
+            if logical:
+                self.aliases.setdefault(logical, name)
+            if name.startswith('static/'):
+                self.aliases.setdefault(name[len('static/'):], name)
+                self.aliases.setdefault('static/' + os.path.basename(name), name)
+                if logical:
+                    self.aliases.setdefault('static/' + os.path.basename(logical), name)
+        self.index = self.assets.get('index.html')
+
+    def load(self, path, name):
+        stat_result = os.stat(path)
+        body = None
+        if stat_result.st_size <= self.max_memory_size:
+            with open(path, 'rb') as f:
+                body = f.read()
+        return Asset(path, name, stat_result, body)
+
+    def resolve(self, path):
+        """(asset, exact) for a request path, or (None, False)"""
+        name = path.lstrip('/') or 'index.html'
+        asset = self.assets.get(name)
+        if asset is not None:
+            return asset, True
+        alias = self.aliases.get(name) or self.aliases.get(unhashed_name(name) or '')
+        if alias is None and name.startswith('static/'):
+            alias = self.aliases.get('static/' + os.path.basename(unhashed_name(name) or name))
+        if alias is not None:
+            return self.assets[alias], False
+        return None, False
+
+    def respond(self, request, path=None):
+        asset, exact = self.resolve(request.path if path is None else path)
+        if asset is None:
+            # Client-side route
+            asset, exact = self.index, False
+            if asset is None:
+                return HttpResponse("React build directory not found. Please build the frontend.", status=500)
+
+        coding = None
+        if asset.encoded:
+            coding = next(
+                (c for c in accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', '')) if c in asset.encoded),
+                None,
+            )
+        etag = asset.etags[coding]
+        cache_control = IMMUTABLE_CACHE_CONTROL if exact and asset.immutable else REVALIDATE_CACHE_CONTROL
+
+        response = get_conditional_response(request, etag=etag, last_modified=asset.last_modified)
+        if response is None:
+            if asset.body is None:
+                response = FileResponse(open(asset.path, 'rb'), content_type=asset.content_type)
+            else:
+                body = asset.encoded[coding] if coding else asset.body
+                response = HttpResponse(b'' if request.method == 'HEAD' else body, content_type=asset.content_type)
+                response['Content-Length'] = len(body)
+                if coding:
+                    response['Content-Encoding'] = coding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(asset.last_modified)
+        response['Cache-Control'] = cache_control
+        if asset.encoded:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+_assets = None
+_lock = threading.Lock()
+
+
+def get_assets():
+    global _assets
+    if _assets is None:
+        with _lock:
+            if _assets is None:
+                _assets = FrontendAssets(settings.FRONTEND_BUILD_DIR)
+    return _assets
+
+
+def serve(request, path=None):
+    """View for the React app; `path` defaults to the request path"""
+    return get_assets().respond(request, path)
@@ -0,0 +1,195 @@
+"""
+Serving of /media/ files.
+
+MEDIA_SERVE_MODE picks who moves the bytes:
+
+- 'django' (default): a FileResponse over the open file. Under a WSGI server
+  with a sendfile-capable wsgi.file_wrapper (gunicorn's sync workers) the
+  file, or the requested part of it, is copied by the kernel with
+  os.sendfile() and never passes through Python.
+- 'x-accel-redirect': nginx. The view only checks the file and the request
+  validators and answers with an X-Accel-Redirect to MEDIA_ACCEL_PREFIX,
+  which must be an internal location aliased to MEDIA_ROOT:
+
+      location /protected-media/ {
+          internal;
+          alias /path/to/backend/media/;
+      }
+
+- 'x-sendfile': Apache mod_xsendfile / lighttpd, given the absolute path.
+
+In every mode content-addressed names (car_images/ab/<sha256>.jpg and their
+car_variants/) are served as immutable for a year, other files get
+MEDIA_CACHE_MAX_AGE and revalidate; If-None-Match / If-Modified-Since are
+answered with 304 and single byte ranges with 206.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# A sha256 directory or file name: the bytes under it never change
+CONTENT_ADDRESSED_RE = re.compile(r'(^|/)[0-9a-f]{64}(/|\.[^/]*$|$)')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+COMPRESSED_TYPES = {
+    'bzip2': 'application/x-bzip',
+    'gzip': 'application/gzip',
+    'xz': 'application/x-xz',
+}
+
+
+class FileRange:
+    """
+    File-like view of `length` bytes of an open file starting at `start`.
+
+    Keeps fileno() so sendfile-based file wrappers still apply: they send from
+    the file's current offset for Content-Length bytes.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def is_immutable(path):
+    return bool(CONTENT_ADDRESSED_RE.search(path))
+
+
+def file_etag(path, stat_result):
+    match = CONTENT_ADDRESSED_RE.search(path)
+    if match:
+        # The name is the digest; the variant file name tells derivatives apart
+        digest = match.group(0).strip('/').split('.')[0]
+        return quote_etag(f'{digest}-{os.path.basename(path)}' if match.group(2) == '/' else digest)
+    return quote_etag(f'{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}')
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a satisfiable single byte range, None to ignore
+    the header (malformed or several ranges: send the whole file), or False
+    when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length or not size:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """An If-Range that no longer matches means the client needs the whole file"""
+    condition = request.META.get('HTTP_IF_RANGE')
+    if not condition:
+        return True
+    if condition.startswith(('"', 'W/')):
+        # Weak validators never match; ours are strong
+        return condition == etag
+    since = parse_http_date_safe(condition)
+    return since is not None and int(last_modified) == since
+
+
+def serve(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    try:
+        stat_result = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404('File not found')
+
+    size = stat_result.st_size
+    last_modified = int(stat_result.st_mtime)
+    etag = file_etag(path, stat_result)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if is_immutable(path)
+            else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+        ),
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        if isinstance(response, HttpResponseNotModified):
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    # As FileResponse: no Content-Encoding, browsers would unpack the download
+    content_type = COMPRESSED_TYPES.get(encoding, content_type) or 'application/octet-stream'
+
+    byte_range = None
+    if request.method == 'GET' and 'HTTP_RANGE' in request.META and if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == 'x-accel-redirect':
+        # nginx handles Range itself and keeps these headers
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + path.lstrip('/'))
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    elif request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range or (0, size - 1)
+        length = max(0, end - start + 1)
+        response = FileResponse(FileRange(open(full_path, 'rb'), start, length), content_type=content_type)
+        response['Content-Length'] = length
+        if byte_range:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    for header, value in headers.items():
+        response[header] = value
+    return response
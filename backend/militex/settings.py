@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_extensions',
 
     'rest_framework',
@@ -151,9 +152,21 @@ STATICFILES_DIRS = [
 WHITENOISE_ROOT = os.path.join(BASE_DIR, 'frontend_build')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# React build served by militex.frontend, and the largest file it keeps in
+# memory (bytes); bigger ones are read from disk on each request
+FRONTEND_BUILD_DIR = os.environ.get('FRONTEND_BUILD_DIR', os.path.join(BASE_DIR, 'frontend_build'))
+FRONTEND_ASSET_MAX_MEMORY_SIZE = int(os.environ.get('FRONTEND_ASSET_MAX_MEMORY_SIZE', 2 * 1024 * 1024))
+
 # Media files (User uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Who sends /media/ bytes (see militex.media): 'django' (FileResponse, sendfile
+# under gunicorn), 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd)
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+# Internal nginx location aliased to MEDIA_ROOT, for 'x-accel-redirect'
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+# Browser cache lifetime (seconds) of media files without a content hash in their name
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -244,3 +257,80 @@ if DEBUG or FORCE_SERVE_MEDIA:
     os.makedirs(MEDIA_ROOT, exist_ok=True)
     os.makedirs(os.path.join(MEDIA_ROOT, 'car_images'), exist_ok=True)
     os.makedirs(os.path.join(MEDIA_ROOT, 'fundraiser_images'), exist_ok=True)
+
+# Cache backend. Cached responses and their generation counters must be
+# shared by every gunicorn worker and the import worker, so the default is a
+# directory on this host; set REDIS_URL when the web and worker processes run
+# on different hosts (e.g. separate Procfile dynos)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'django_cache')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
+    }
+}
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Cached /api/cars/facets/ results; invalidated on every Car write
+CARS_FACETS_CACHE_TIMEOUT = int(os.environ.get('CARS_FACETS_CACHE_TIMEOUT', 300))
+# Cached anonymous car list/detail responses; invalidated by Car/CarImage signals
+CARS_RESPONSE_CACHE_TIMEOUT = int(os.environ.get('CARS_RESPONSE_CACHE_TIMEOUT', 600))
+
+# Site the auto.ria.com scraper talks to; `manage.py mock_autoria` serves a
+# local stand-in for load tests and offline imports
+AUTORIA_URL = os.environ.get('AUTORIA_URL', 'https://auto.ria.com').rstrip('/')
+
+# auto.ria.com scraper: connection pool size, per-host politeness budget
+# (requests/second and burst) and retry policy for 429/5xx responses
+SCRAPER_CONCURRENCY = int(os.environ.get('SCRAPER_CONCURRENCY', 8))
+SCRAPER_RATE = float(os.environ.get('SCRAPER_RATE', 4))
+SCRAPER_BURST = int(os.environ.get('SCRAPER_BURST', 4))
+SCRAPER_MAX_RETRIES = int(os.environ.get('SCRAPER_MAX_RETRIES', 4))
+SCRAPER_BACKOFF = float(os.environ.get('SCRAPER_BACKOFF', 0.5))
+SCRAPER_TIMEOUT = float(os.environ.get('SCRAPER_TIMEOUT', 15))
+# Processes parsing fetched listing pages (0 parses on the event loop's
+# threads) and how many fetched pages may wait for them before fetching pauses
+SCRAPER_PARSE_WORKERS = int(os.environ.get('SCRAPER_PARSE_WORKERS', min(4, os.cpu_count() or 1)))
+SCRAPER_PARSE_BACKLOG = int(os.environ.get('SCRAPER_PARSE_BACKLOG', 16))
+# On-disk cache of scraped pages and photos ('' disables it), its size bound
+# (least recently used entries go first), and how long responses without
+# ETag/Last-Modified are reused; search pages list new listings, so less long
+SCRAPER_CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', os.path.join(BASE_DIR, 'scraper_cache'))
+SCRAPER_CACHE_MAX_SIZE = int(os.environ.get('SCRAPER_CACHE_MAX_SIZE', 1024 * 1024 * 1024))
+SCRAPER_CACHE_TTL = float(os.environ.get('SCRAPER_CACHE_TTL', 24 * 60 * 60))
+SCRAPER_CACHE_SEARCH_TTL = float(os.environ.get('SCRAPER_CACHE_SEARCH_TTL', 10 * 60))
+
+# Listing page extractor: 'lxml' (cars.extract) or 'bs4', the BeautifulSoup
+# reference implementation it is checked against
+LISTING_PARSER = os.environ.get('LISTING_PARSER', 'lxml')
+
+# Rows per bulk_create/bulk_update/COPY statement when importing cars
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+# run_import_worker: jobs run at once, seconds between queue polls, how
+# often a running job saves progress, and after how long without that
+# heartbeat (and up to how many attempts) a job is handed to another worker
+IMPORT_WORKER_CONCURRENCY = int(os.environ.get('IMPORT_WORKER_CONCURRENCY', 2))
+IMPORT_WORKER_POLL_INTERVAL = float(os.environ.get('IMPORT_WORKER_POLL_INTERVAL', 2))
+IMPORT_JOB_HEARTBEAT_INTERVAL = float(os.environ.get('IMPORT_JOB_HEARTBEAT_INTERVAL', 5))
+IMPORT_JOB_STALE_AFTER = float(os.environ.get('IMPORT_JOB_STALE_AFTER', 120))
+IMPORT_JOB_MAX_ATTEMPTS = int(os.environ.get('IMPORT_JOB_MAX_ATTEMPTS', 3))
+
+# Seconds between writes of an import run's journal (cars.journal); a crash
+# refetches at most this much work
+IMPORT_JOURNAL_FLUSH_INTERVAL = float(os.environ.get('IMPORT_JOURNAL_FLUSH_INTERVAL', 2))
+
+# Imported listing photos: parallel downloads, per-image size limit (bytes),
+# socket timeout and total time allowed for one image (seconds)
+IMAGE_DOWNLOAD_WORKERS = int(os.environ.get('IMAGE_DOWNLOAD_WORKERS', 8))
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+IMAGE_DOWNLOAD_TIMEOUT = float(os.environ.get('IMAGE_DOWNLOAD_TIMEOUT', 10))
+IMAGE_DOWNLOAD_DEADLINE = float(os.environ.get('IMAGE_DOWNLOAD_DEADLINE', 30))
+
+# Resized WebP/JPEG derivatives of car photos, rendered in a process pool
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')]
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 2))
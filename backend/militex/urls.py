@@ -3,11 +3,10 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import TemplateView
-from django.views.static import serve
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import csrf
+from . import frontend, media
 
 # API routes
 urlpatterns = [
@@ -25,10 +24,10 @@ urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Serve media files in all environments (development and production)
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    re_path(r'^media/(?P<path>.*)$', media.serve),
 ]
 
 # Catch-all for React frontend
 urlpatterns += [
-    re_path(r'^(?!media).*$', TemplateView.as_view(template_name='index.html')),
+    re_path(r'^(?!media).*$', frontend.serve),
 ]
\ No newline at end of file
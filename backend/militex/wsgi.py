@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'militex.settings')
 
 application = get_wsgi_application()
+
+# Index the React build before the first request instead of during it
+from militex import frontend  # noqa: E402
+
+frontend.get_assets()
@@ -1,13 +1,16 @@
 import requests
 from bs4 import BeautifulSoup
 import asyncio
+import os
 import re
 from parcing_cars_saving import Car, Seller, AsyncSessionLocal, init_db
 from sqlalchemy.future import select
 
 headers = {"User-Agent": "Mozilla/5.0"}
 
-BASE_URL = 'https://auto.ria.com/uk/search/?indexName=auto&body.id[0]=5&category_id=1&page=1'
+# Point AUTORIA_URL at `manage.py mock_autoria` to run without the live site
+AUTORIA_URL = os.environ.get('AUTORIA_URL', 'https://auto.ria.com')
+BASE_URL = AUTORIA_URL + '/uk/search/?indexName=auto&body.id[0]=5&category_id=1&page=1'
 
 # Helper functions to map Ukrainian values to standardized values
 def map_fuel_type(fuel_text):
@@ -54,7 +57,7 @@ def get_suv_links(limit=100):
     links = []
     for a in soup.select('a.address[href]'):
         href = a['href']
-        if href.startswith('https://auto.ria.com'):
+        if href.startswith(AUTORIA_URL):
             links.append(href)
         if len(links) >= limit:
             break